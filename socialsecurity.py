@@ -7,14 +7,39 @@ Created on Tue Aug 24 05:19:01 2021
 """
 
 import os
+import tempfile
 import pandas as pd
 import ss_cola as ssc
 import ss_awi as ssa
 
+# known numeric columns of the global data files, so the C engine doesn't
+# have to infer them
+_DATA_FILE_DTYPES = {'Max_Wages': 'float64', 'AWI': 'float64',
+                     'COLA': 'float64', 'AWI_Increase': 'float64'}
+
 
 def _validate_historical_data(hdf):
+    """
+    Checks that the global history data is complete and consistent with
+    the current year, which is the last year in the data.
+
+    These checks guard the input data file rather than internal invariants,
+    so they raise ValueError instead of asserting, and still run under
+    python -O.
+
+    Parameters
+    ----------
+    hdf : pandas DataFrame
+        The global history data, indexed by year.
+
+    Returns
+    -------
+    None.
+
+    """
     rows, _ = hdf.shape
-    assert rows > 0
+    if rows == 0:
+        raise ValueError("historical data file is empty")
 
     current_year = hdf.index.max()
     # the current year is the last year in the global data file
@@ -23,24 +48,157 @@ def _validate_historical_data(hdf):
     # COLA must end with current year - 1
     # AWI must end with current_year - 2
 
-    assert not pd.isnull(hdf.at[current_year, 'Max_Wages'])
+    if pd.isnull(hdf.at[current_year, 'Max_Wages']):
+        raise ValueError("historical data has no Max_Wages for {}"
+                         .format(current_year))
     cola_max_year = current_year - ssc.SSCOLA.mw_cola_offset
-    assert not pd.isnull(hdf.at[cola_max_year, 'COLA'])
+    if pd.isnull(hdf.at[cola_max_year, 'COLA']):
+        raise ValueError("historical data has no COLA for {}"
+                         .format(cola_max_year))
     awi_max_year = current_year - ssa.SSAWI.mw_awi_offset
-    assert not pd.isnull(hdf.at[awi_max_year, 'AWI'])
+    if pd.isnull(hdf.at[awi_max_year, 'AWI']):
+        raise ValueError("historical data has no AWI for {}"
+                         .format(awi_max_year))
 
     # there should not be any value for the COLA or AWI for the current
     # year nor AWI for the year before that
     # the math on this looks weird, but it's based on the offset
-    null_cola_years = [year for year in hdf.index
-                       if year >= (current_year + 1
-                                   - ssc.SSCOLA.mw_cola_offset)]
-    null_awi_years = [year for year in hdf.index
-                      if year >= (current_year + 1 - ssa.SSAWI.mw_awi_offset)]
-    for year in null_cola_years:
-        assert pd.isnull(hdf.at[year, 'COLA'])
-    for year in null_awi_years:
-        assert pd.isnull(hdf.at[year, 'AWI'])
+    null_cola_year = current_year + 1 - ssc.SSCOLA.mw_cola_offset
+    if not hdf.loc[hdf.index >= null_cola_year, 'COLA'].isna().all():
+        raise ValueError("historical data has a COLA for {} or later"
+                         .format(null_cola_year))
+    null_awi_year = current_year + 1 - ssa.SSAWI.mw_awi_offset
+    if not hdf.loc[hdf.index >= null_awi_year, 'AWI'].isna().all():
+        raise ValueError("historical data has an AWI for {} or later"
+                         .format(null_awi_year))
+
+
+def _read_csv(data_file):
+    """
+    Reads a CSV data file, using the pyarrow engine if it is installed
+    """
+    try:
+        return pd.read_csv(data_file, engine='pyarrow', index_col='Year')
+    except ImportError:
+        # pyarrow is optional, fall back to the default C engine
+        return pd.read_csv(data_file, index_col='Year',
+                           dtype=_DATA_FILE_DTYPES)
+
+
+def _read_excel(data_file):
+    """
+    Reads an Excel data file
+    """
+    # TBD: test excel
+    return pd.read_excel(data_file, index_col='Year')
+
+
+# data file readers by file extension, anything else is read as CSV
+_READERS = {'.csv': _read_csv, '.xlsx': _read_excel, '.xls': _read_excel,
+            '.parquet': pd.read_parquet, '.pkl': pd.read_pickle}
+
+# DataFrames already read by _read_data_file, by (path, modification time)
+_data_frame_cache = {}
+
+
+def _write_cache_file(df, cache_file):
+    """
+    Pickles a DataFrame to cache_file for _read_data_file. The pickle is
+    written to a temporary file in the same directory first and then moved
+    into place, so a partly written cache file is never left behind.
+    Errors are ignored, as the cache is only an optimization (e.g. the
+    directory is read-only or the disk is full).
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        The contents of the data file.
+    cache_file : str
+        Path to the cache file.
+
+    Returns
+    -------
+    None.
+
+    """
+    tmp_file = None
+    try:
+        fd, tmp_file = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(cache_file)),
+            prefix=os.path.basename(cache_file) + ".", suffix=".tmp")
+        os.close(fd)
+        df.to_pickle(tmp_file)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        if tmp_file is not None:
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+
+
+def _read_data_file(data_file):
+    """
+    Reads a global data file into a pandas DataFrame. The reader is chosen
+    by the file extension (see _READERS).
+
+    If SSConfig.use_file_cache is set, the parsed DataFrame is pickled
+    alongside the data file (data_file + ".pkl") and that pickle is read
+    instead on later calls, as long as the data file has not been modified
+    since the pickle was written. Files that are already parquet or pickle
+    are not cached on disk. This is off by default: reading a pickle can
+    run arbitrary code, so only turn it on when nobody else can write to the
+    directory of the data file.
+
+    If SSConfig.use_memory_cache is set (the default), the DataFrame is kept
+    in memory for the life of the process, so repeated SSConfig
+    instantiations do not read the file again unless it is modified (its
+    size or modification time changes). The DataFrame is shared between
+    callers, so it must not be modified.
+
+    Parameters
+    ----------
+    data_file : str
+        Path to the data file.
+
+    Returns
+    -------
+    pandas DataFrame
+        The contents of the data file, indexed by 'Year'.
+
+    """
+    if SSConfig.use_memory_cache:
+        stat = os.stat(data_file)
+        key = (os.path.abspath(data_file), stat.st_mtime_ns, stat.st_size)
+        df = _data_frame_cache.get(key)
+        if df is not None:
+            return df
+
+    ext = os.path.splitext(data_file)[1].lower()
+    use_cache = SSConfig.use_file_cache and ext not in ('.parquet', '.pkl')
+    cache_file = data_file + ".pkl"
+    df = None
+    if (use_cache and os.path.exists(cache_file)
+            and (os.path.getmtime(cache_file)
+                 >= os.path.getmtime(data_file))):
+        try:
+            df = pd.read_pickle(cache_file)
+        except Exception:
+            # the cache is only an optimization, so a truncated or otherwise
+            # unreadable pickle (e.g. from another pandas version) is
+            # ignored, and rewritten below
+            df = None
+    if df is None:
+        df = _READERS.get(ext, _read_csv)(data_file)
+        if use_cache:
+            _write_cache_file(df, cache_file)
+
+    if df.index.name != 'Year':
+        # parquet and pickle files may have been saved without the index
+        df = df.set_index('Year')
+    if SSConfig.use_memory_cache:
+        _data_frame_cache[key] = df
+    return df
 
 
 class SSConfig:
@@ -52,6 +210,12 @@ class SSConfig:
     global_history_data_file = os.path.join(".", "SS_global_history.csv")
     global_projections_data_file = \
         os.path.join(".", "SS_global_projections.csv")
+    use_memory_cache = True  # see _read_data_file
+    use_file_cache = False  # see _read_data_file, opt-in
+    config_kwargs = frozenset(('cola_proj', 'ss_wage_growth',
+                               'historical_data_file', 'infl_proj_file'))
+
+    __slots__ = ('current_year', 'cola', 'awi')
 
     def __init__(self, **kwargs):
         """
@@ -82,47 +246,32 @@ class SSConfig:
 
         # begin defaults
 
-        hist_data_file = SSConfig.global_history_data_file
-        infl_proj_file = SSConfig.global_projections_data_file
-        cola_proj_val = None
-        sswg_proj_val = None
-
         # TBD: test COLA passed in as float, series, dict, or list
         # TBD: test Soc Sec wage growth passed as float, series, dict, or list
-        for key, value in kwargs.items():
-            if key == 'cola_proj':
-                # overrides data in infl_proj_file
-                cola_proj_val = value
-            if key == 'ss_wage_growth':
-                # overrides data in infl_proj_file
-                sswg_proj_val = value
-            if key == 'historical_data_file':
-                assert isinstance(value, str)
-                hist_data_file = value
-            if key == 'infl_proj_file':
-                # overridden if both cola_proj and ss_wage_growth are set
-                assert isinstance(value, str)
-                infl_proj_file = value
-
-        if ".xlsx" in hist_data_file:
-            # TBD: test excel
-            hdf = pd.read_excel(hist_data_file)
-        else:
-            hdf = pd.read_csv(hist_data_file)
-
-        hdf = hdf.set_index('Year')
+        unknown = set(kwargs) - SSConfig.config_kwargs
+        if unknown:
+            raise TypeError("unknown SSConfig keyword arguments: {}"
+                            .format(sorted(unknown)))
+
+        # both override data in infl_proj_file
+        cola_proj_val = kwargs.get('cola_proj')
+        sswg_proj_val = kwargs.get('ss_wage_growth')
+        hist_data_file = kwargs.get('historical_data_file',
+                                    SSConfig.global_history_data_file)
+        assert isinstance(hist_data_file, str)
+        # overridden if both cola_proj and ss_wage_growth are set
+        infl_proj_file = kwargs.get('infl_proj_file',
+                                    SSConfig.global_projections_data_file)
+        assert isinstance(infl_proj_file, str)
+
+        hdf = _read_data_file(hist_data_file)
         self.current_year = hdf.index.max()
         # the current year is the last year in the global data file
 
         _validate_historical_data(hdf)
 
         if cola_proj_val is None or sswg_proj_val is None:
-            if ".xlsx" in infl_proj_file:
-                # TBD: test excel
-                idf = pd.read_excel(infl_proj_file)
-            else:
-                idf = pd.read_csv(infl_proj_file)
-            idf = idf.set_index('Year')
+            idf = _read_data_file(infl_proj_file)
 
         if cola_proj_val is None:
             cola_proj_val = idf['COLA'].dropna()
@@ -134,17 +283,21 @@ class SSConfig:
         # initialize self.awi to None so that when we run cola constructor
         # for the first time, it doesn't update the awi projection
 
-        self.cola = ssc.SSCOLA(self, hdf['COLA'].dropna(), cola_proj_val)
+        cola_hist = hdf['COLA'].dropna()
+        awi_hist = hdf['AWI'].dropna()
+        mw_hist = hdf['Max_Wages'].dropna()
+
+        self.cola = ssc.SSCOLA(self, cola_hist, cola_proj_val)
 
-        self.awi = ssa.SSAWI(self, hdf['AWI'].dropna(),
-                             hdf['Max_Wages'].dropna(), sswg_proj_val)
+        self.awi = ssa.SSAWI(self, awi_hist, mw_hist, sswg_proj_val)
         # self._set_wage_growth_projection(sswg_proj_val)
         # Above will populate self.cola.get_cola_history() with the COLA for
         # each future year
         # Note that self.cola.get_cola_history() will still contain the
         # historical COLA
-        # This will populate self.awi_dict with the AWI for each future year
-        # Note that self.awi_dict will still contain the historical AWI
+        # The first query past the history will populate self.awi.awi_arr
+        # with the AWI for each future year
+        # Note that self.awi.awi_arr will still contain the historical AWI
         # It will also calculate the maximum wage for each future year
         #
         # This routine may be called externally to change the projections
@@ -183,6 +336,12 @@ class SSConfig:
         """
         return self.awi.get_max_ss_wage(year)
 
+    def get_max_ss_wage_array(self, start_year, end_year):
+        """
+        See SSAWI.get_max_ss_wage_array in ss_awi.py for more details
+        """
+        return self.awi.get_max_ss_wage_array(start_year, end_year)
+
     def get_awi_value(self, year):
         """
         See SSAWI.get_awi_value in ss_awi.py for more details
@@ -195,18 +354,55 @@ class SSConfig:
         """
         return self.awi.calc_income_index_factor(birth_year)
 
+    def calc_income_index_factor_array(self, birth_year):
+        """
+        See SSAWI.calc_income_index_factor_array in ss_awi.py for more details
+        """
+        return self.awi.calc_income_index_factor_array(birth_year)
+
     def calc_base_benefit(self, birth_year, aime):
         """
         See SSAWI.calc_base_benefit in ss_awi.py for more details
         """
         return self.awi.calc_base_benefit(birth_year, aime)
 
+    def calc_base_benefit_array(self, birth_year, aime_arr):
+        """
+        See SSAWI.calc_base_benefit_array in ss_awi.py for more details
+        """
+        return self.awi.calc_base_benefit_array(birth_year, aime_arr)
+
     def ss_cola_adjust(self, base_value, base_year, benefit_year):
         """
         See SSCOLA.ss_cola_adjust in ss_cola.py for more details
         """
         return self.cola.ss_cola_adjust(base_value, base_year, benefit_year)
 
+    def ss_cola_adjust_years(self, base_value, base_year, end_year):
+        """
+        See SSCOLA.ss_cola_adjust_years in ss_cola.py for more details
+        """
+        return self.cola.ss_cola_adjust_years(base_value, base_year, end_year)
+
+    def ss_cola_adjust_batch(self, base_values, base_years, benefit_year):
+        """
+        See SSCOLA.ss_cola_adjust_batch in ss_cola.py for more details
+        """
+        return self.cola.ss_cola_adjust_batch(base_values, base_years,
+                                              benefit_year)
+
+    def get_colas(self, start_year, end_year):
+        """
+        See SSCOLA.get_colas in ss_cola.py for more details
+        """
+        return self.cola.get_colas(start_year, end_year)
+
+    def get_cola_factors(self, start_year, end_year):
+        """
+        See SSCOLA.get_cola_factors in ss_cola.py for more details
+        """
+        return self.cola.get_cola_factors(start_year, end_year)
+
     def get_cola_history(self):
         """
         See SSCOLA.get_cola_history in ss_cola.py for more details
@@ -7,6 +7,8 @@ Created on Fri Sep 10 12:12:17 2021
 """
 
 import math
+from types import MappingProxyType
+import numpy as np
 import pandas as pd
 import ss_cola as ssc
 
@@ -16,23 +18,77 @@ SS_LIFESPAN = 130
 
 def _max_wage_formula(awi):
     """
-    Returns the maximum wage associated with a specific AWI
+    Returns the maximum wage associated with a specific AWI, or an array of
+    maximum wages for an array of AWIs
     """
-    return round(awi * 60600.0 / 22935.42 / 300.0, 0) * 300.0
+    return np.round(awi * 60600.0 / 22935.42 / 300.0) * 300.0
 
 
 def _bend_point1_formula(awi):
     """
-    Returns bend point 1 associated with a specific AWI
+    Returns bend point 1 associated with a specific AWI, or an array of bend
+    points for an array of AWIs
     """
-    return round(awi * 180.0 / 9779.44, 0)
+    return np.round(awi * 180.0 / 9779.44)
 
 
 def _bend_point2_formula(awi):
     """
-    Returns bend point 2 associated with a specific AWI
+    Returns bend point 2 associated with a specific AWI, or an array of bend
+    points for an array of AWIs
     """
-    return round(awi * 1085.0 / 9779.44, 0)
+    return np.round(awi * 1085.0 / 9779.44)
+
+
+def _base_benefit_formula(aime, bend_point_1, bend_point_2):
+    """
+    Returns the base benefit for an AIME and the bend points, rounded down
+    to the nearest dime
+    """
+    if aime < bend_point_1:
+        base_benefit = aime * 0.9
+    elif aime < bend_point_2:
+        base_benefit = ((bend_point_1 * 0.9)
+                        + ((aime - bend_point_1) * 0.32))
+    else:
+        base_benefit = ((bend_point_1 * 0.9)
+                        + ((bend_point_2 - bend_point_1)
+                           * 0.32)
+                        + ((aime - bend_point_2) * 0.15))
+    return math.floor(base_benefit * 10.0) / 10.0
+
+
+def _year_array(hist, base_year, size):
+    """
+    Returns an array of length size, indexed by year - base_year, holding
+    the values in hist. Years without a value are set to NaN. Years in hist
+    outside of base_year through base_year + size - 1 are ignored.
+    """
+    arr = np.full(size, np.nan)
+    if isinstance(hist, pd.Series):
+        hist = hist.dropna()
+        years = hist.index.to_numpy(dtype=np.int64)
+        values = hist.to_numpy(dtype=np.float64)
+    else:
+        years = np.fromiter(hist.keys(), dtype=np.int64, count=len(hist))
+        values = np.fromiter(hist.values(), dtype=np.float64,
+                             count=len(hist))
+    in_range = (years >= base_year) & (years < base_year + size)
+    arr[years[in_range] - base_year] = values[in_range]
+    return arr
+
+
+def _year_value(arr, year):
+    """
+    Returns the value for the year in an array built by _year_array, or 0.0
+    if the year is out of range or has no value.
+    """
+    index = year - SSAWI.base_year
+    if 0 <= index < len(arr):
+        value = float(arr[index])
+        if not math.isnan(value):
+            return value
+    return 0.0
 
 
 class SSAWI:
@@ -49,6 +105,12 @@ class SSAWI:
     ss_wage_growth_default = 0.036  # cmp. ann. avg. last 20 yrs.
     mw_awi_offset = 2  # number of years maximum wage lags from AWI
     ss_eligibility_age = SS_BENEFIT_AGE - mw_awi_offset  # 60
+    base_year = 1937  # first year of the maximum wage history
+    max_year = base_year + 300  # exclusive, well past the projections
+
+    __slots__ = ('config', 'awi_proj', 'current_year', 'mw_arr', 'awi_arr',
+                 'mw_dict', 'mw_values', 'iif_cache', 'iif_arr_cache',
+                 'bp1_arr', 'bp2_arr', 'projected')
 
     def __init__(self, ss_config, awi_hist, mw_hist,
                  awi_proj=ss_wage_growth_default):
@@ -88,56 +150,36 @@ class SSAWI:
         self.current_year = self.config.get_current_year()
         # begin defaults
 
+        # The AWI and maximum wages are kept in arrays indexed by
+        # year - SSAWI.base_year. Years with no value are NaN.
         # TBD: test AWI growth passed in as dict or list
-        if isinstance(mw_hist, pd.Series):
-            self.mw_dict = mw_hist.dropna().to_dict()
-        elif isinstance(mw_hist, dict):
-            self.mw_dict = mw_hist.copy()
-
-        if isinstance(awi_hist, pd.Series):
-            self.awi_dict = awi_hist.dropna().to_dict()
-        elif isinstance(mw_hist, dict):
-            self.awi_dict = awi_hist.copy()
-
-        self.set_wage_growth_projection()
-
-    def _calc_max_wage(self, mwyear):
-        """
-        This internal method calculates the maximum wage limit based on the
-        statutory formula and the following rules:
-          It cannot increase from the previous year if there was no COLA
-              for that year
-          It cannot decrease from the previous year
-        Note this MUST be calculated AFTER the cola projections have been set
-        and AFTER the previous year's max wage has been calculated
-
-        Parameters
-        ----------
-        mwyear : int
-            The year the maximum wage is calcalated for.
-
-        Returns
-        -------
-        max_wage: int
-            The maximum wage limit for social security payroll taxes for the
-            specified year.
-
-        """
-        max_wage = 0.0
-        cola_dict = self.config.get_cola_history()
-        assert len(cola_dict) > 0
-        awiyear = mwyear - SSAWI.mw_awi_offset
-        if awiyear in self.awi_dict:
-            awi = self.awi_dict[awiyear]
-            max_wage = _max_wage_formula(awi)
-            colayear = mwyear - ssc.SSCOLA.mw_cola_offset
-            prevmwyear = max_wage - 1
-            if colayear in cola_dict and prevmwyear in self.mw_dict:
-                if ((cola_dict[colayear] == 0.0)
-                        or (max_wage < self.mw_dict[prevmwyear])):
-                    # self.mw_dict[mwyear] = self.mw_dict[prevmwyear]
-                    max_wage = self.mw_dict[prevmwyear]
-        return max_wage
+        size = SSAWI.max_year - SSAWI.base_year
+        self.mw_arr = _year_array(mw_hist, SSAWI.base_year, size)
+        self.awi_arr = _year_array(awi_hist, SSAWI.base_year, size)
+        # dict of self.mw_arr for get_max_ss_wage(), built when first asked
+        self.mw_dict = None
+        # self.mw_arr with 0.0 for years without a value, for
+        # get_max_ss_wage_array(), built when first asked
+        self.mw_values = None
+
+        # The income index factors depend only on the birth year and the
+        # AWI, so they are cached by birth year until the AWI projection
+        # changes
+        self.iif_cache = {}
+        # the same index factors as arrays, see
+        # calc_income_index_factor_array()
+        self.iif_arr_cache = {}
+
+        # The bend points for every year the AWI is known, indexed like
+        # self.awi_arr by the year the worker turns 60. Set along with the
+        # AWI projection.
+        self.bp1_arr = None
+        self.bp2_arr = None
+
+        # The projection out to SS_LIFESPAN years is only calculated when
+        # something past the history is first asked for, see
+        # _ensure_projected
+        self.projected = False
 
     def set_wage_growth_projection(self, projection=None):
         """
@@ -163,7 +205,8 @@ class SSAWI:
 
         Side effects
         -------
-        Sets self.mw_dict
+        Marks the projected years of self.awi_arr and self.mw_arr, and the
+        bend points, to be recalculated when next needed
 
         """
         # TBD: unit test support for all the dtypes for ss wage growth
@@ -178,19 +221,70 @@ class SSAWI:
         if projection is not None:
             self.awi_proj = projection
 
-        cola_dict = self.config.get_cola_history()
-        assert len(cola_dict) > 0
-        wg_dict = ssc.get_proj_dict(
-            self.current_year + 1 - SSAWI.mw_awi_offset,
-            self.current_year + SS_LIFESPAN,
-            self.awi_proj, SSAWI.ss_wage_growth_default)
+        self.iif_cache.clear()
+        self.iif_arr_cache.clear()
+        self.mw_dict = None
+        self.mw_values = None
+        self.projected = False
+
+    def _ensure_projected(self):
+        """
+        Internal routine.
+        Calculates the AWI and maximum wage projections, and the bend points,
+        if they have not been calculated for the current projections.
+
+        Returns
+        -------
+        None.
 
-        for year in wg_dict:
-            self.awi_dict[year] = round(
-                self.awi_dict[year-1] * (1.0 + wg_dict[year]), 2)
-            mwyear = year + SSAWI.mw_awi_offset
-            # sets self.mw_dict[mwyear]
-            self.mw_dict[mwyear] = self._calc_max_wage(mwyear)
+        Side effects
+        -------
+        Sets the projected years of self.awi_arr and self.mw_arr, and
+        self.bp1_arr and self.bp2_arr
+
+        """
+        if self.projected:
+            return
+
+        start_year = self.current_year + 1 - SSAWI.mw_awi_offset
+        final_year = self.current_year + SS_LIFESPAN
+        wg_dict = ssc.get_proj_dict(start_year, final_year, self.awi_proj,
+                                    SSAWI.ss_wage_growth_default)
+
+        # The AWI is rounded to the cent every year, so the projection cannot
+        # be collapsed into a single cumulative product without changing the
+        # result, so the recurrence is run in a single pass over the
+        # projection years.
+        start = start_year - SSAWI.base_year
+        awi = float(self.awi_arr[start - 1])
+        awi_list = []
+        for year in range(start_year, final_year + 1):
+            awi = round(awi * (1.0 + wg_dict[year]), 2)
+            awi_list.append(awi)
+        awi_proj = np.array(awi_list)
+        self.awi_arr[start:start + len(awi_proj)] = awi_proj
+
+        # The maximum wage is calculated with the statutory formula from the
+        # AWI two years earlier, with the following rules:
+        #   It cannot increase from the previous year if there was no COLA
+        #       for that year
+        #   It cannot decrease from the previous year
+        # A running maximum enforces the second rule. Years following a year
+        # without a COLA are excluded from it (-inf) so they keep the
+        # previous year's maximum wage.
+        max_wage = _max_wage_formula(awi_proj)
+        cola_offset = SSAWI.mw_awi_offset - ssc.SSCOLA.mw_cola_offset
+        colas = np.array(self.config.get_colas(start_year + cola_offset,
+                                               final_year + 1 + cola_offset))
+        max_wage[colas == 0.0] = -np.inf
+        mw_start = start + SSAWI.mw_awi_offset
+        prev_max_wage = self.mw_arr[mw_start - 1:mw_start]
+        self.mw_arr[mw_start:mw_start + len(awi_proj)] = np.maximum.accumulate(
+            np.concatenate((prev_max_wage, max_wage)))[1:]
+
+        self.bp1_arr = _bend_point1_formula(self.awi_arr)
+        self.bp2_arr = _bend_point2_formula(self.awi_arr)
+        self.projected = True
 
     def get_max_ss_wage(self, year=None):
         """
@@ -201,7 +295,7 @@ class SSAWI:
 
         If the year passed is later than the current year, then the figure
         returned is a projection based on the AWI growth projections and
-        the formula/rules set by the SSA (see _calc_max_wage)
+        the formula/rules set by the SSA (see set_wage_growth_projection)
 
         If no year is specified (year is None), then a dictionary, hashed by
         year, is returned with all of the maximum wages for each year. For the
@@ -227,19 +321,76 @@ class SSAWI:
         float or dict
             float: The maximum wage for the specified year.
             dict: A dictionary, hashed by year, of the maximum wages for all
-                    years
+                    years. The dictionary is cached and shared between
+                    callers, so it must not be modified.
 
         """
+        if year is None or year > self.current_year:
+            self._ensure_projected()
         if year is not None:
-            if year in self.mw_dict:
-                return self.mw_dict[year]
-            return 0.0
+            return _year_value(self.mw_arr, year)
+        if self.mw_dict is None:
+            self.mw_dict = {year: value for year, value
+                            in zip(range(SSAWI.base_year, SSAWI.max_year),
+                                   self.mw_arr.tolist())
+                            if not math.isnan(value)}
         return self.mw_dict
 
+    def get_max_ss_wage_array(self, start_year, end_year):
+        """
+        Retrieves the social security maximum wages for a range of years,
+        the same as calling get_max_ss_wage() for each year.
+
+        Parameters
+        ----------
+        start_year : int
+            The first year of the range.
+        end_year : int
+            The year after the last year of the range.
+
+        Returns
+        -------
+        numpy array of float
+            The maximum wage for each year, indexed by year - start_year.
+            Years with no maximum wage are 0.0. The array may be shared
+            between callers, so it is read-only.
+
+        """
+        self._ensure_projected()
+        if self.mw_values is None:
+            self.mw_values = np.nan_to_num(self.mw_arr, nan=0.0)
+            self.mw_values.setflags(write=False)
+        start = start_year - SSAWI.base_year
+        end = end_year - SSAWI.base_year
+        if 0 <= start <= end <= len(self.mw_values):
+            return self.mw_values[start:end]
+        # the range is not entirely covered, pad with 0.0
+        wages = np.zeros(max(end - start, 0))
+        first = max(start, 0)
+        last = min(end, len(self.mw_values))
+        if first < last:
+            wages[first - start:last - start] = self.mw_values[first:last]
+        wages.setflags(write=False)
+        return wages
+
     def get_awi_value(self, year):
-        if year in self.awi_dict:
-            return self.awi_dict[year]
-        return 0.0
+        """
+        Retrieves the AWI for the specified year, historical or projected.
+
+        Parameters
+        ----------
+        year : int
+            The year for which to get the AWI.
+
+        Returns
+        -------
+        float
+            The AWI for the year, or 0.0 if there is none.
+
+        """
+        if year > self.current_year - SSAWI.mw_awi_offset:
+            self._ensure_projected()
+        return _year_value(self.awi_arr, year)
 
     def _calc_bend_points(self, birth_year_worker):
         """
@@ -259,11 +410,10 @@ class SSAWI:
             The second (higher) bend point for the monthly benefit calculation.
 
         """
+        self._ensure_projected()
         # bpyear is 60
-        bpyear = birth_year_worker + SSAWI.ss_eligibility_age
-        bp1 = _bend_point1_formula(self.awi_dict[bpyear])
-        bp2 = _bend_point2_formula(self.awi_dict[bpyear])
-        return bp1, bp2
+        index = birth_year_worker + SSAWI.ss_eligibility_age - SSAWI.base_year
+        return float(self.bp1_arr[index]), float(self.bp2_arr[index])
 
     def calc_income_index_factor(self, birth_year):
         """
@@ -282,23 +432,60 @@ class SSAWI:
 
         Returns
         -------
-        incidx : dictionary
-            The income index factor dictionary, hashed by year.
+        incidx : MappingProxyType
+            The income index factor dictionary, hashed by year. This is a
+            read-only view of the dictionary, which is cached and shared
+            between callers.
+
+        """
+        incidx = self.iif_cache.get(birth_year)
+        if incidx is None:
+            incidx = dict(zip(range(birth_year, birth_year + SS_LIFESPAN),
+                              self.calc_income_index_factor_array(
+                                  birth_year).tolist()))
+            self.iif_cache[birth_year] = incidx
+        return MappingProxyType(incidx)
+
+    def calc_income_index_factor_array(self, birth_year):
+        """
+        Compute the income index factor, based on AWI, as an array.
+        See calc_income_index_factor for details.
+
+        Parameters
+        ----------
+        birth_year : int
+            Worker's birth year.
+
+        Returns
+        -------
+        incidx : numpy array of float
+            The income index factor for each year, indexed by
+            year - birth_year, for SS_LIFESPAN years.
+            The array is cached and shared between callers, so it is
+            read-only.
 
         """
-        awi_at_ss_eligibility_age = \
-            self.awi_dict[birth_year + SSAWI.ss_eligibility_age]
-        incidx = {}
-        for year in range(birth_year, birth_year + SS_LIFESPAN):
-            if year < 1951:
-                incidx[year] = 0.0
-            else:
-                age = year - birth_year
-                if age < SSAWI.ss_eligibility_age:
-                    incidx[year] = (awi_at_ss_eligibility_age
-                                    / self.awi_dict[year])
-                else:
-                    incidx[year] = 1.0
+        incidx = self.iif_arr_cache.get(birth_year)
+        if incidx is not None:
+            return incidx
+
+        self._ensure_projected()
+        bpyear = birth_year + SSAWI.ss_eligibility_age
+        awi_at_ss_eligibility_age = float(
+            self.awi_arr[bpyear - SSAWI.base_year])
+
+        # earnings are indexed from 1951 up to the year before the worker
+        # turns 60, earlier years count for nothing, later years at face value
+        first_year = max(birth_year, 1951)
+        incidx = np.ones(SS_LIFESPAN)
+        incidx[:first_year - birth_year] = 0.0
+        if bpyear > first_year:
+            incidx[first_year - birth_year:bpyear - birth_year] = (
+                awi_at_ss_eligibility_age
+                / self.awi_arr[first_year - SSAWI.base_year:
+                               bpyear - SSAWI.base_year])
+        incidx.setflags(write=False)
+        self.iif_arr_cache[birth_year] = incidx
         return incidx
 
     def calc_base_benefit(self, birth_year, aime):
@@ -330,17 +517,41 @@ class SSAWI:
 
         """
         bend_point_1, bend_point_2 = self._calc_bend_points(birth_year)
+        base_benefit = _base_benefit_formula(aime, bend_point_1, bend_point_2)
+        return base_benefit, bend_point_1, bend_point_2
 
-        if aime < bend_point_1:
-            base_benefit = aime * 0.9
-        elif aime < bend_point_2:
-            base_benefit = ((bend_point_1 * 0.9)
-                            + ((aime - bend_point_1) * 0.32))
-        else:
-            base_benefit = ((bend_point_1 * 0.9)
-                            + ((bend_point_2 - bend_point_1)
-                               * 0.32)
-                            + ((aime - bend_point_2) * 0.15))
-        base_benefit = math.floor(base_benefit * 10.0) / 10.0
+    def calc_base_benefit_array(self, birth_year, aime_arr):
+        """
+        Compute the base monthly benefit for many workers born in the same
+        year at once. See calc_base_benefit for details.
+
+        Parameters
+        ----------
+        birth_year : int
+            The workers' birth year.
+        aime_arr : array-like of float
+            The workers' average indexed monthly earnings.
 
+        Returns
+        -------
+        base_benefit: numpy array of float
+            The workers' base benefits in the dollars for the year of
+            eligibility, in the same order as aime_arr
+        bend_point_1: float
+            The first bend point used for the calculation
+        bend_point_2: float
+            The second bend point used for the calculation
+
+        """
+        bend_point_1, bend_point_2 = self._calc_bend_points(birth_year)
+        aime = np.asarray(aime_arr, dtype=np.float64)
+        base_benefit = np.where(
+            aime < bend_point_1,
+            aime * 0.9,
+            np.where(aime < bend_point_2,
+                     (bend_point_1 * 0.9) + ((aime - bend_point_1) * 0.32),
+                     ((bend_point_1 * 0.9)
+                      + ((bend_point_2 - bend_point_1) * 0.32)
+                      + ((aime - bend_point_2) * 0.15))))
+        base_benefit = np.floor(base_benefit * 10.0) / 10.0
         return base_benefit, bend_point_1, bend_point_2
@@ -6,6 +6,8 @@ Created on Fri Sep 10 11:27:53 2021
 @author: dfox
 """
 import math
+from types import MappingProxyType
+import numpy as np
 import pandas as pd
 
 SS_BENEFIT_AGE = 62
@@ -35,13 +37,14 @@ def get_proj_dict(start_year, final_year, projection, default):
         pandas Series: missing data will be dropped first, so the resulting
             dictionary returned will fill in those missing values with the
             most recent previous year's value
-        dict: the new dictionary will be this one but with filling in
-            missing values with the year's most recent value
+        dict: the new dictionary will be a copy of this one but with filling
+            in missing values with the year's most recent value
         list: list must begin with start_year and be populated sequentially
             and there can be no missing values, except that the list does not
             have to end prior to final_year, and the dictionary
             returned will set the values for all subsequent years to the
             value of the most recent previous year specified.
+        float: the value is used for every year.
     default : float
         This is the value used for start_year if start_year is not specified.
 
@@ -52,10 +55,15 @@ def get_proj_dict(start_year, final_year, projection, default):
 
     """
 
+    if isinstance(projection, (int, float)):
+        # a fixed value for every year, the common case
+        return dict.fromkeys(range(start_year, final_year + 1),
+                             float(projection))
+
     if isinstance(projection, pd.Series):
         pr_dict = projection.dropna().to_dict()
     elif isinstance(projection, dict):
-        pr_dict = projection
+        pr_dict = projection.copy()
     elif isinstance(projection, list):
         pr_dict = {}
         year = start_year
@@ -64,20 +72,93 @@ def get_proj_dict(start_year, final_year, projection, default):
             year += 1
             if year > final_year:
                 break
-    else:  # type float
-        pr_dict = {}
+    else:  # no projection
+        return dict.fromkeys(range(start_year, final_year + 1), default)
+
+    # forward fill the years from start_year through final_year: each year
+    # without a value takes the value of the most recent previous year that
+    # has one, or the default if there is none since start_year
+    count = final_year + 1 - start_year
+    years = np.fromiter(pr_dict.keys(), dtype=np.int64, count=len(pr_dict))
+    values = np.fromiter(pr_dict.values(), dtype=np.float64,
+                         count=len(pr_dict))
+    in_range = (years >= start_year) & (years <= final_year)
+    filled = np.full(count, default, dtype=np.float64)
+    filled[years[in_range] - start_year] = values[in_range]
+    known = np.full(count, -1)
+    known[years[in_range] - start_year] = years[in_range] - start_year
+    recent = np.maximum.accumulate(known)
+    filled = np.where(recent >= 0, filled[recent], default)
+
+    pr_dict.update(zip(range(start_year, final_year + 1), filled.tolist()))
+    return pr_dict
+
+
+def _carry_forward_cola(years, colas, basis_year=None):
+    """
+    Carries any negative COLA forward to the following years, as described
+    in SSCOLA.set_cola_projection, and rounds each COLA to the nearest tenth
+    of a percent.
+
+    Parameters
+    ----------
+    years : list of int
+        The years, in ascending order.
+    colas : list of float
+        The COLA for each year in years.
+    basis_year : int, optional
+        The most recent year before years that has a COLA, when continuing
+        from COLAs that have already been carried forward. The default is
+        None, meaning there is none.
 
-    recent_year = start_year
-    for year in range(start_year, final_year + 1):
-        if year not in pr_dict:
-            if recent_year in pr_dict:
-                pr_dict[year] = pr_dict[recent_year]
+    Returns
+    -------
+    list of float
+        The COLA to apply for each year in years.
+
+    """
+    # checked once for all years rather than in the loop
+    assert min(colas) >= 0.0
+    out = []
+    if basis_year is None:
+        basis_year = years[0] - 1
+    basis_index = 1.0
+    for year, cola in zip(years, colas):
+        if cola < 0.0:
+            basis_index = basis_index * (1.0 + cola)
+            out.append(0.0)
+            # keep basis year
+        elif basis_year < year - 1:
+            # we have an old basis year, apply it
+            basis_index = basis_index * (1.0 + cola)
+            if basis_index > 1.0:
+                out.append(round(basis_index - 1.0, 3))
+                basis_year = year
+                basis_index = 1.0
             else:
-                pr_dict[year] = default
+                out.append(0.0)
         else:
-            recent_year = year
+            # normal case
+            out.append(round(cola, 3))
+            basis_year = year
+            basis_index = 1.0
+    return out
 
-    return pr_dict
+
+def _cola_adjust_kernel(value, colas):
+    """
+    Applies each COLA in colas to value in turn, rounding down to the nearest
+    dime each time, and returns the result.
+
+    The value is floored to the dime in floating point every year, as the
+    SSA does; integer dimes would round differently. COLA is never negative,
+    so a value that starts at a dime or more never drops to zero, and there
+    is no need to check for it in the loop.
+    """
+    floor = math.floor
+    for cola in colas:
+        value = floor(value * (1.0 + cola) * 10.0) / 10.0
+    return value
 
 
 class SSCOLA:
@@ -93,6 +174,8 @@ class SSCOLA:
 
     ss_cola_default = 0.024  # cmp. ann. avg. last 20 yrs.
     mw_cola_offset = 1  # number of years maximum wage lags from COLA
+    base_year = 1937  # first year of the COLA arrays
+    max_year = base_year + 300  # exclusive, well past the projections
 
     def __init__(self, ss_config, cola_hist, cola_proj=ss_cola_default):
         """
@@ -124,31 +207,101 @@ class SSCOLA:
         Side Effects
         ------------
         Initializes object variables, of course.
-        Specifically it calculates the cola_dict variable which contains
+        Specifically it calculates the cola_arr variable which contains
         the COLA for all years, past (actual) values, and future (projected)
         values
 
         """
         self.config = ss_config
-        self.cola_proj = cola_proj
         self.current_year = self.config.get_current_year()
         # begin defaults
 
+        # The COLA for every year from SSCOLA.base_year, indexed by
+        # year - SSCOLA.base_year, with the default for years without one.
+        # cola_known marks the years that have one.
+        size = SSCOLA.max_year - SSCOLA.base_year
+        self.cola_arr = np.full(size, SSCOLA.ss_cola_default)
+        self.cola_known = np.zeros(size, dtype=bool)
+        # dict of the known years of self.cola_arr, see cola_dict
+        self.cola_dict_cache = None
+
         # TBD: test COLA passed in as dict or list
         if isinstance(cola_hist, pd.Series):
-            self.cola_dict = cola_hist.dropna().to_dict()
+            cola_hist = cola_hist.dropna()
+            self._set_colas(cola_hist.index.to_numpy(dtype=np.int64),
+                            cola_hist.to_numpy(dtype=np.float64))
         elif isinstance(cola_hist, dict):
-            self.cola_dict = cola_hist.copy()
+            self._set_colas(
+                np.fromiter(cola_hist.keys(), dtype=np.int64,
+                            count=len(cola_hist)),
+                np.fromiter(cola_hist.values(), dtype=np.float64,
+                            count=len(cola_hist)))
+
+        # The history is carried forward once here and kept, so that
+        # set_cola_projection() only needs to carry forward the projected
+        # years
+        index = np.flatnonzero(self.cola_known)
+        # the historical years with a COLA, in order
+        self.hist_cola_years = index + SSCOLA.base_year
+        if len(index) > 0:
+            self.cola_arr[index] = _carry_forward_cola(
+                self.hist_cola_years.tolist(), self.cola_arr[index].tolist())
+        self.hist_cola_arr = self.cola_arr.copy()
+        self.hist_cola_known = self.cola_known.copy()
+
+        self.set_cola_projection(cola_proj, rebuild_awi=False)
+
+    def _set_colas(self, years, colas):
+        """
+        Internal routine.
+        Stores the COLA for each year in self.cola_arr. Years outside of
+        SSCOLA.base_year through SSCOLA.max_year are ignored.
+
+        Parameters
+        ----------
+        years : numpy array of int
+            The years.
+        colas : numpy array of float
+            The COLA for each year in years.
 
-        self.set_cola_projection(cola_proj)
+        Returns
+        -------
+        None.
 
-    def set_cola_projection(self, projection):
         """
+        in_range = (years >= SSCOLA.base_year) & (years < SSCOLA.max_year)
+        index = years[in_range] - SSCOLA.base_year
+        self.cola_arr[index] = colas[in_range]
+        self.cola_known[index] = True
+        self.cola_dict_cache = None
+
+    @property
+    def cola_dict(self):
+        """
+        The COLA for each year that has one, as a dictionary hashed by year.
+        Built from self.cola_arr when first needed. The dictionary is cached
+        and shared between callers, so it must not be modified.
+        """
+        if self.cola_dict_cache is None:
+            index = np.flatnonzero(self.cola_known)
+            self.cola_dict_cache = dict(zip(
+                (index + SSCOLA.base_year).tolist(),
+                self.cola_arr[index].tolist()))
+        return self.cola_dict_cache
+
+    def set_cola_projection(self, projection, rebuild_awi=True):
+        """
+        Sets the COLA future projections.
 
         Parameters
         ----------
-        projection : TYPE
-            DESCRIPTION.
+        projection : pandas Series, dict, list, or float
+            The yearly COLA projections. See get_proj_dict for how each type
+            is interpreted.
+        rebuild_awi : bool, optional
+            Whether to have the AWI object recalculate its projections, which
+            depend on the COLA. The default is True. The constructor passes
+            False, as the AWI object is created afterwards.
 
         Returns
         -------
@@ -170,13 +323,20 @@ class SSCOLA:
         #       be 0, and the COLA for the next year would be 1.0%.
         self.cola_proj = projection
 
-        self.cola_dict.update(
-            get_proj_dict(self.current_year + 1 - SSCOLA.mw_cola_offset,
-                          self.current_year + SS_LIFESPAN - 1,
-                          self.cola_proj, SSCOLA.ss_cola_default))
+        proj_dict = get_proj_dict(
+            self.current_year + 1 - SSCOLA.mw_cola_offset,
+            self.current_year + SS_LIFESPAN - 1,
+            self.cola_proj, SSCOLA.ss_cola_default)
+        proj_years = np.fromiter(proj_dict.keys(), dtype=np.int64,
+                                 count=len(proj_dict))
+        self.cola_arr[:] = self.hist_cola_arr
+        self.cola_known[:] = self.hist_cola_known
+        self._set_colas(proj_years,
+                        np.fromiter(proj_dict.values(), dtype=np.float64,
+                                    count=len(proj_dict)))
 
         # TBD: The following code "carries forward" any negative COLA in
-        #   the COLA dictionary. Thus if cost-of-living decreases 0.5% in
+        #   the COLA array. Thus if cost-of-living decreases 0.5% in
         #   one year but then increases 1.5% in the next, the actual COLA
         #   applied for the first year will be 0.0% (because it can't be
         #   negative by statute), and the actual COLA for the second year will
@@ -187,32 +347,38 @@ class SSCOLA:
         #   the time of this comment, all SSA projections for inflation are
         #   2.4% for each year after the next one (which still forecasts
         #   high inflation)
-        basis_year = min(self.cola_dict.keys()) - 1
-        basis_index = 1.0
-        for year in self.cola_dict:
-            # print(year, type(self.cola_dict), type(self.cola_dict[year]))
-            assert self.cola_dict[year] >= 0.0
-            if self.cola_dict[year] < 0.0:
-                basis_index = basis_index * (1.0 + self.cola_dict[year])
-                self.cola_dict[year] = 0.0
-                # keep basis year
-            elif basis_year < year - 1:
-                # we have an old basis year, apply it
-                basis_index = basis_index * (1.0 + self.cola_dict[year])
-                if basis_index > 1.0:
-                    self.cola_dict[year] = round(1.0 - basis_index, 3)
-                    basis_year = year
-                    basis_index = 1.0
-                else:
-                    self.cola_dict[year] = 0.0
-            else:
-                # normal case
-                self.cola_dict[year] = round(self.cola_dict[year], 3)
-                basis_year = year
-                basis_index = 1.0
+        # The history has already been carried forward (see __init__), so
+        # this continues from the first projected year, which may overwrite
+        # the last historical years
+        first_year = max(int(proj_years.min()), SSCOLA.base_year)
+        first = first_year - SSCOLA.base_year
+        hist_index = np.searchsorted(self.hist_cola_years, first_year)
+        basis_year = (int(self.hist_cola_years[hist_index - 1])
+                      if hist_index > 0 else None)
+        index = np.flatnonzero(self.cola_known[first:]) + first
+        if len(index) > 0:
+            self.cola_arr[index] = _carry_forward_cola(
+                (index + SSCOLA.base_year).tolist(),
+                self.cola_arr[index].tolist(), basis_year)
+        self.cola_dict_cache = None
+        # the multiplier (1 + COLA) for each year, shared by every worker's
+        # COLA calculations, see get_cola_factors
+        self.cola_factor_arr = 1.0 + self.cola_arr
+
+        # The inflation factor between each year and the current year, as
+        # used by value_in_current_dollars(), indexed like self.cola_arr.
+        # The factor is a product taken from the earlier year forward, so
+        # for later years it is a running product from the current year.
+        # Earlier years each start their own product, so they are only
+        # calculated when first asked for (NaN until then), see
+        # _calc_past_inflation.
+        current = self.current_year - SSCOLA.base_year
+        self.inflation_arr = np.full(len(self.cola_arr), np.nan)
+        self.inflation_arr[current:] = np.multiply.accumulate(
+            np.concatenate(([1.0], 1.0 + self.cola_arr[current:-1])))
 
         # since COLA influences AWI calculations...
-        awiobj = self.config.get_awiobj()
+        awiobj = self.config.get_awiobj() if rebuild_awi else None
         if awiobj is not None:
             awiobj.set_wage_growth_projection()
             # only update the awi projection if it has already been done
@@ -231,7 +397,8 @@ class SSCOLA:
         base_value : float
             The value of the benefit in the base year. Note that this value
             should already be rounded down to the nearest dime, but this
-            routine will do that rounding if it hasn't been.
+            routine will do that rounding if it hasn't been. Must not be
+            negative.
         base_year : int
             The year for which the base benefit applies.
         benefit_year : int
@@ -245,16 +412,100 @@ class SSCOLA:
 
         """
         assert benefit_year >= base_year
+        assert base_value >= 0.0
         value = float(math.floor(base_value * 10.0)) / 10.0
         if value == 0.0:
+            # anything under a dime, COLA can't raise it from zero
             return 0.0
-        for year in range(base_year, benefit_year):
-            if year in self.cola_dict:
-                cola = self.cola_dict[year]
-            else:
-                cola = SSCOLA.ss_cola_default
-            value = value * (1.0 + cola)
-            value = math.floor(value * 10.0) / 10.0
+        return _cola_adjust_kernel(value,
+                                   self.get_colas(base_year, benefit_year))
+
+    def ss_cola_adjust_years(self, base_value, base_year, end_year):
+        """
+        Applies COLA to a value (base_value) from the base year, each year
+        through to the end year, and returns the benefit for each of those
+        years. See ss_cola_adjust for details.
+        The results are identical to calling ss_cola_adjust for each year in
+        turn, each time from the previous year's benefit: once a value has
+        been rounded down to the nearest dime, rounding it again leaves it
+        unchanged.
+
+        Parameters
+        ----------
+        base_value : float
+            The value of the benefit in the base year. Must not be negative.
+        base_year : int
+            The year for which the base benefit applies.
+        end_year : int
+            The last year (inclusive) for which the benefit is calculated.
+
+        Returns
+        -------
+        value: numpy array of float
+            The benefit in each year from base_year + 1 through end_year
+            after COLA has been applied.
+            Always rounded down to the nearest dime.
+
+        """
+        assert end_year >= base_year
+        assert base_value >= 0.0
+        floor = math.floor
+        value = float(floor(base_value * 10.0)) / 10.0
+        out = np.empty(end_year - base_year)
+        for index, factor in enumerate(self.get_cola_factors(base_year,
+                                                             end_year)):
+            value = floor(value * factor * 10.0) / 10.0
+            out[index] = value
+        return out
+
+    def ss_cola_adjust_batch(self, base_values, base_years, benefit_year):
+        """
+        Applies COLA to many values at once, each from its own base year
+        through to the same benefit year. See ss_cola_adjust for details.
+        The results are identical to calling ss_cola_adjust for each value.
+
+        Parameters
+        ----------
+        base_values : array-like of float
+            The value of each benefit in its base year.
+        base_years : array-like of int
+            The base year of each benefit, in the same order as base_values.
+        benefit_year : int
+            The year in which the COLA-applied benefits will be calculated.
+
+        Returns
+        -------
+        value: numpy array of float
+            The benefits in the benefit year after COLA has been applied,
+            in the same order as base_values.
+            Always rounded down to the nearest dime.
+
+        """
+        base_years = np.asarray(base_years, dtype=np.int64)
+        value = np.asarray(base_values, dtype=np.float64)
+        assert (base_years <= benefit_year).all()
+        assert (value >= 0.0).all()
+        value = np.floor(value * 10.0) / 10.0
+        if len(value) == 0:
+            return value
+        # every value is stepped through the years together, each one
+        # starting in its own base year, so each is floored in the same
+        # order as in ss_cola_adjust. Sorted by base year, the values that
+        # have started by any year are a leading slice.
+        order = np.argsort(base_years, kind='stable')
+        sorted_value = value[order]
+        first_year = int(base_years[order[0]])
+        started = np.searchsorted(base_years[order],
+                                  np.arange(first_year, benefit_year),
+                                  side='right')
+        for count, cola in zip(started.tolist(),
+                               self.get_colas(first_year, benefit_year)):
+            step = sorted_value[:count]
+            step *= 1.0 + cola
+            step *= 10.0
+            np.floor(step, out=step)
+            step /= 10.0
+        value[order] = sorted_value
         return value
 
     def value_in_current_dollars(self, base_value, base_year):
@@ -277,19 +528,119 @@ class SSCOLA:
         float
             The value in current dollars. This is not rounded off.
 
+        """
+        index = base_year - SSCOLA.base_year
+        if 0 <= index < len(self.inflation_arr):
+            value = float(self.inflation_arr[index])
+            if math.isnan(value):
+                self._calc_past_inflation()
+                value = float(self.inflation_arr[index])
+        else:
+            value = self._calc_inflation(base_year)
+        if base_year < self.current_year:
+            return base_value * value
+        return base_value / value
+
+    def _calc_past_inflation(self):
+        """
+        Internal routine.
+        Calculates the inflation factor for every year in self.inflation_arr
+        earlier than the current year, all at once.
+
+        Each factor is the product of (1 + COLA) from its own year up to the
+        current year, multiplied in that order. The products are run side by
+        side, so each one is multiplied in the same order as
+        _calc_inflation() would, and the results are identical.
+
+        Returns
+        -------
+        None.
+
+        """
+        current = self.current_year - SSCOLA.base_year
+        past = np.ones(current)
+        for index, cola in enumerate(self.cola_arr[:current].tolist()):
+            # the years up to this one have started their products
+            past[:index + 1] *= 1.0 + cola
+        self.inflation_arr[:current] = past
+
+    def _calc_inflation(self, base_year):
+        """
+        Internal routine.
+        Calculates the inflation factor between the base year and the current
+        year, for value_in_current_dollars().
+
+        Parameters
+        ----------
+        base_year : int
+            The base year.
+
+        Returns
+        -------
+        value : float
+            The product of (1 + COLA) for each year from the earlier of the
+            two years up to (not including) the later one.
+
         """
         value = 1.0
         earlier_year = min(base_year, self.current_year)
         later_year = max(base_year, self.current_year)
-        for year in range(earlier_year, later_year):
-            if year in self.cola_dict:
-                cola = self.cola_dict[year]
-            else:
-                cola = SSCOLA.ss_cola_default
+        for cola in self.get_colas(earlier_year, later_year):
             value = value * (1.0 + cola)
-        if base_year < self.current_year:
-            return base_value * value
-        return base_value / value
+        return value
+
+    def get_colas(self, start_year, end_year):
+        """
+        Retrieves the COLA for each year from start_year up to (not including)
+        end_year, using the default COLA for years without one.
+
+        Parameters
+        ----------
+        start_year : int
+            The first year.
+        end_year : int
+            The year after the last year.
+
+        Returns
+        -------
+        list of float
+            The COLA for each year, in order.
+
+        """
+        start = start_year - SSCOLA.base_year
+        end = end_year - SSCOLA.base_year
+        if 0 <= start and end <= len(self.cola_arr):
+            return self.cola_arr[start:end].tolist()
+        return [float(self.cola_arr[year - SSCOLA.base_year])
+                if 0 <= year - SSCOLA.base_year < len(self.cola_arr)
+                else SSCOLA.ss_cola_default
+                for year in range(start_year, end_year)]
+
+    def get_cola_factors(self, start_year, end_year):
+        """
+        Retrieves the COLA multiplier (1 + COLA) for each year from start_year
+        up to (not including) end_year, the same as adding 1.0 to each value
+        returned by get_colas. The multipliers are calculated once when the
+        COLA projection is set.
+
+        Parameters
+        ----------
+        start_year : int
+            The first year.
+        end_year : int
+            The year after the last year.
+
+        Returns
+        -------
+        list of float
+            The COLA multiplier for each year, in order.
+
+        """
+        start = start_year - SSCOLA.base_year
+        end = end_year - SSCOLA.base_year
+        if 0 <= start and end <= len(self.cola_factor_arr):
+            return self.cola_factor_arr[start:end].tolist()
+        return [1.0 + cola for cola in self.get_colas(start_year, end_year)]
 
     def get_cola_history(self):
         """
@@ -297,8 +648,9 @@ class SSCOLA:
 
         Returns
         -------
-        dict
-            The COLA history.
+        MappingProxyType
+            The COLA history, hashed by year. This is a read-only view of
+            cola_dict, so it is not copied.
 
         """
-        return self.cola_dict
+        return MappingProxyType(self.cola_dict)
@@ -7,12 +7,64 @@ Created on Fri Sep 10 02:11:23 2021
 """
 
 import math
+import numpy as np
 import pandas as pd
-from dateutil.relativedelta import relativedelta
 
 SS_LIFESPAN = 130
 
 
+def _series_to_array(data, year0, size, list_year=None, out=None):
+    """
+    Converts values for each year into an array indexed by year - year0.
+    Years outside of the array are ignored, and years without a value are
+    set to 0.0.
+
+    Parameters
+    ----------
+    data : pandas Series or dict or list
+        The values. For a pandas Series, the Year is the Index.
+        For a dict, the Year is the hash.
+        For a list, the first item is for list_year, the next for the year
+        after, and so on.
+    year0 : int
+        The year of index 0 of the array.
+    size : int
+        The length of the array.
+    list_year : int, optional
+        The year of the first item when data is a list. The default is None,
+        which means year0.
+    out : numpy array of float, optional
+        An array of length size to put the values in. The default is None,
+        which means a new array is returned.
+
+    Returns
+    -------
+    numpy array of float
+        The values, indexed by year - year0.
+
+    """
+    if out is None:
+        out = np.zeros(size)
+    else:
+        out.fill(0.0)
+    if isinstance(data, pd.Series):
+        data = data.dropna()
+        years = data.index.to_numpy(dtype=np.int64)
+        values = data.to_numpy(dtype=np.float64)
+    elif isinstance(data, dict):
+        years = np.fromiter(data.keys(), dtype=np.int64, count=len(data))
+        values = np.fromiter(data.values(), dtype=np.float64,
+                             count=len(data))
+    else:
+        values = np.asarray(data, dtype=np.float64)
+        years = np.arange(len(values)) + (year0 if list_year is None
+                                          else list_year)
+    index = years - year0
+    in_range = (index >= 0) & (index < size)
+    out[index[in_range]] = values[in_range]
+    return out
+
+
 class SSEarnings:
     """
     Class for handling Social Security Earnings based calculations.
@@ -61,6 +113,15 @@ class SSEarnings:
     start_max_income_age = 22
     # this is used for testing and is not user-configurable
 
+    __slots__ = ('worker', 'config', 'birthday', 'benefit_birthday',
+                 'birth_months', 'current_year', 'year0', 'hist_end',
+                 'max_ss_wage_arr', 'ss_earn_hist', 'ss_earn_future',
+                 'ss_earn_all', 'ss_earn_to_retire', 'total_earn_hist',
+                 'total_earn_future', 'total_earn_all', 'total_earn_to_retire',
+                 'pwg', 'aime', 'retire_age_years', 'retire_age_months',
+                 'retire_index', 'index_factor', 'indexed_earn_all',
+                 'max_years')
+
     def __init__(self, ss_worker, income_history, **kwargs):
         """
         Constructor for the SSEarnings class.
@@ -177,36 +238,56 @@ class SSEarnings:
         None.
 
         """
+        self.worker = ss_worker
+        self.config = self.worker.get_config()
+        self.birthday = self.worker.get_birthday()
+        self.benefit_birthday = self.worker.get_calc_benefit_birthday()
+        # the benefit birthday in months since year 0, for the retirement date
+        self.birth_months = (self.benefit_birthday.year * 12
+                             + self.benefit_birthday.month - 1)
+        self.current_year = self.config.get_current_year()
+
+        # The worker's earnings are kept in arrays indexed by
+        # year - self.year0, from the worker's birth year through
+        # SS_LIFESPAN years later. Years without earnings are 0.0.
+        self.year0 = self.birthday.year
+        size = SS_LIFESPAN + 1
+        # the index of the current year, history is everything before it
+        self.hist_end = min(max(self.current_year - self.year0, 0), size)
+        # the social security maximum wage for each year of the arrays
+        self.max_ss_wage_arr = self.config.get_max_ss_wage_array(
+            self.year0, self.year0 + size)
+
         # The worker's history of social security earnings
-        self.ss_earn_hist_dict = {}
+        self.ss_earn_hist = np.zeros(size)
 
         # The worker's projected future social security earnings, without
         # any retirement termination. This is re-calculated every time a
         # new earnings profile or growth projection is applied.
-        self.ss_earn_future_dict = {}
+        self.ss_earn_future = np.zeros(size)
 
         # The worker's historical and projected social security earnings,
         # without any retirement termination. This is re-calculated every time
         # a new earnings profile or growth projection is applied.
-        self.ss_earn_all_dict = {}
+        self.ss_earn_all = np.zeros(size)
 
         # The worker's historical and projected social security earnings,
         # terminated at retirement. This is re-calculated every time a new
         # earnings profile, growth projection, or retirement date is applied.
-        self.ss_earn_to_retire_dict = {}
+        self.ss_earn_to_retire = np.zeros(size)
 
         # The worker's history of total earnings
-        self.total_earn_hist_dict = {}
+        self.total_earn_hist = np.zeros(size)
 
         # The worker's projected future total earnings, without
         # any retirement termination. This is re-calculated every time a
         # new earnings profile or growth projection is applied.
-        self.total_earn_future_dict = {}
+        self.total_earn_future = np.zeros(size)
 
         # The worker's historical and projected total earnings,
         # without any retirement termination. This is re-calculated every time
         # a new earnings profile or growth projection is applied.
-        self.total_earn_all_dict = {}
+        self.total_earn_all = np.zeros(size)
         # Note that historical total earnings may not be available, but
         # instead just the historical social security earnings. This is okay
         # because we only really need to know the difference during the year
@@ -219,17 +300,25 @@ class SSEarnings:
         # The worker's historical and projected total earnings,
         # terminated at retirement. This is re-calculated every time a new
         # earnings profile, growth projection, or retirement date is applied.
-        self.total_earn_to_retire_dict = {}
+        self.total_earn_to_retire = np.zeros(size)
 
         # The projected personal wage growth for the worker. This is not the
         # same as the global AWI growth projections.
-        self.pwg_dict = {}
+        self.pwg = np.zeros(size)
+
+        # The worker's social security earnings in self.ss_earn_all indexed
+        # to wage inflation (see self.index_factor). This only changes with
+        # the earnings, not the retirement age, so it is kept for the AIME.
+        self.indexed_earn_all = np.zeros(size)
+
+        # the index of the retirement year in the earnings arrays, set with
+        # the retirement age
+        self.retire_index = size
 
-        self.worker = ss_worker
-        self.config = self.worker.get_config()
-        self.birthday = self.worker.get_birthday()
-        self.benefit_birthday = self.worker.get_calc_benefit_birthday()
         self.aime = 0.0  # worker's average indexed monthly earnings
+        # the number of years of earnings the AIME averages, which only
+        # depends on the worker's birth year
+        self.max_years = ss_worker.get_max_inc_years()
         fra = ss_worker.get_fra()
 
         # we default the worker's retirement age to the full retirement age
@@ -238,8 +327,6 @@ class SSEarnings:
         self.retire_age_years = fra[0]
         self.retire_age_months = fra[1]
 
-        self.current_year = self.config.get_current_year()
-
         # Here we start to do some work. We have the data we need to
         # calculate the worker's earnings index factor for each year
         # The index factor profile is the same for each worker who share
@@ -248,8 +335,14 @@ class SSEarnings:
         # new statute could change that without having this class know about
         # it at all. All this (SSEarnings) class knows about is the actual
         # birthday).
-        self.index_factor = self.config.calc_income_index_factor(
+        index_factor = self.config.calc_income_index_factor_array(
             self.benefit_birthday.year)
+        # line the index factors up with the earnings arrays, the years
+        # past the end of them count for nothing
+        offset = self.year0 - self.benefit_birthday.year
+        self.index_factor = np.zeros(size)
+        count = min(len(index_factor) - offset, size)
+        self.index_factor[:count] = index_factor[offset:offset + count]
 
         # Now we set the income/earnings profile for the worker
         # We load the earnings history, but we also calculate the future
@@ -263,28 +356,18 @@ class SSEarnings:
         # We keep track/cache all the possible future earnings without regards
         # to retirement for optimization purposes.
 
-        next_income_year = self.current_year
-        next_income_amount = 'extrapolate'
-        next_income_amount = 0.0
-        income_future = None
-        pwg = SSEarnings.personal_wage_growth_default
-
-        for key, value in kwargs.items():
-            if key == 'income_future':
-                income_future = value
-            if key == 'next_income_year':
-                if value != 'current_year':
-                    next_income_year = value
-            elif key == 'next_income_amount':
-                next_income_amount = value
-            # elif key == 'final_income_year':
-                # final_income_year = value
-            elif key == 'personal_wage_growth':
-                pwg = value
-            elif key == 'retire_age_years':
-                self.retire_age_years = value
-            elif key == 'retire_age_months':
-                self.retire_age_months = value
+        # kwargs also holds the worker's own keywords, which are ignored here
+        income_future = kwargs.get('income_future')
+        next_income_year = kwargs.get('next_income_year', self.current_year)
+        if next_income_year == 'current_year':
+            next_income_year = self.current_year
+        next_income_amount = kwargs.get('next_income_amount', 0.0)
+        pwg = kwargs.get('personal_wage_growth',
+                         SSEarnings.personal_wage_growth_default)
+        self.retire_age_years = kwargs.get('retire_age_years',
+                                           self.retire_age_years)
+        self.retire_age_months = kwargs.get('retire_age_months',
+                                            self.retire_age_months)
 
         # Here we apply the social security earnings history
         self._set_income_history(income_history)
@@ -330,11 +413,7 @@ class SSEarnings:
         Re-calcuates AIME
 
         """
-        self.retire_age_years = retire_age_years
-        self.retire_age_months = retire_age_months
-
-        self._set_retirement()
-        self._calc_aime()
+        self.reset_batch(retirement_age=(retire_age_years, retire_age_months))
 
     def reset_income_future_by_profile(self, income_future):
         """
@@ -356,10 +435,7 @@ class SSEarnings:
         Re-calcuates AIME
 
         """
-        self._set_income_future_by_profile(income_future)
-        self._set_earn_all()
-        self._set_retirement()
-        self._calc_aime()
+        self.reset_batch(income_future=income_future)
 
     def reset_income_future_by_next(self, next_income_year, next_income_amount,
                                     pwg, final_income_year):
@@ -390,11 +466,63 @@ class SSEarnings:
         Re-calcuates AIME
 
         """
-        self._set_income_future_by_next(next_income_year, next_income_amount,
-                                        pwg, final_income_year)
-        self._set_earn_all()
-        self._set_retirement()
-        self._calc_aime()
+        self.reset_batch(income_future_next=(next_income_year,
+                                             next_income_amount, pwg,
+                                             final_income_year))
+
+    def reset_batch(self, retirement_age=None, income_future=None,
+                    income_future_next=None):
+        """
+        Resets any of the retirement age and the estimated future income of
+        the worker at once, and re-calculates AIME only once for all of the
+        changes. Parameters that are None are left unchanged.
+
+        Parameters
+        ----------
+        retirement_age : tuple: (int, int), optional
+            Age in years and months at which the worker decides to retire.
+            See reset_retirement_age.
+        income_future : pandas Series or dict or list, optional
+            See reset_income_future_by_profile.
+        income_future_next : tuple, optional
+            (next_income_year, next_income_amount, pwg, final_income_year)
+            See reset_income_future_by_next.
+            Cannot be used together with income_future.
+
+        Returns
+        -------
+        None.
+
+        Side Effects
+        ------------
+        Re-calcuates AIME
+
+        """
+        if income_future is not None and income_future_next is not None:
+            raise ValueError("income_future and income_future_next cannot "
+                             "both be reset")
+
+        if income_future is not None:
+            self._set_income_future_by_profile(income_future)
+        elif income_future_next is not None:
+            self._set_income_future_by_next(*income_future_next)
+        income_changed = (income_future is not None
+                          or income_future_next is not None)
+
+        # the earnings are always up to date for the current retirement age,
+        # so there is nothing to do for it if it is not changing
+        retire_changed = (
+            retirement_age is not None
+            and tuple(retirement_age) != (self.retire_age_years,
+                                          self.retire_age_months))
+        if retire_changed:
+            self.retire_age_years, self.retire_age_months = retirement_age
+
+        if income_changed:
+            self._set_earn_all()
+        if income_changed or retire_changed:
+            self._set_retirement()
+            self._calc_aime()
 
     def get_aime(self):
         """
@@ -429,28 +557,32 @@ class SSEarnings:
             The income during the specified year.
 
         """
-        if year in self.total_earn_to_retire_dict:
-            return self.total_earn_to_retire_dict[year]
+        index = year - self.year0
+        if 0 <= index < len(self.total_earn_to_retire):
+            return float(self.total_earn_to_retire[index])
         return 0.0
 
-    def _set_ss_income_future(self):
+    def _set_ss_income_future(self, end=None):
         """
         Internal routine sets the social security earnings to the maximum
         amount if the total earnings are higher.
 
+        Parameters
+        ----------
+        end : int, optional
+            The index of total_earn_future after its last year of income,
+            where every later year is 0.0. The default is None, which means
+            the whole array is checked.
+
         Returns
         -------
         None.
 
         """
-        for year in self.total_earn_future_dict:
-            max_wage = self.config.get_max_ss_wage(year)
-            self.ss_earn_future_dict[year] = \
-                min(self.total_earn_future_dict[year], max_wage)
-#            if self.total_earn_future_dict[year] > max_wage:
-#                print("knocked down ss_earn_future ({}) to max wage ({})"
-#                      .format(self.total_earn_future_dict[year], max_wage))
-#                print("for year {}".format(year))
+        np.minimum(self.total_earn_future[:end], self.max_ss_wage_arr[:end],
+                   out=self.ss_earn_future[:end])
+        if end is not None:
+            self.ss_earn_future[end:] = 0.0
 
     def _set_income_history(self, income_history):
         """
@@ -472,42 +604,28 @@ class SSEarnings:
         None.
 
         """
-        if isinstance(income_history, pd.Series):
-            self.total_earn_hist_dict = income_history.dropna().to_dict()
-        elif isinstance(income_history, dict):
-            self.total_earn_hist_dict = income_history.copy()
-        elif isinstance(income_history, list):
-            # must be indexed from 0 (birth year), end in current year - 1
+        if isinstance(income_history, (pd.Series, dict, list)):
+            # a list must be indexed from 0 (birth year), end in current
+            # year - 1
             # note that this is the actual birth year not the SSA birth year
             # So if you were born 1/1/1960, the birth year is 1960
-            self.total_earn_hist_dict = {}
-            for index, income in enumerate(income_history):
-                self.total_earn_hist_dict[index + self.birthday.year] = income
-        elif income_history == "use_max":
+            _series_to_array(income_history, self.year0,
+                             len(self.total_earn_hist),
+                             out=self.total_earn_hist)
+        else:
+            self.total_earn_hist.fill(0.0)
+        if isinstance(income_history, str) and income_history == "use_max":
             # income_history None should only be used for testing purposes
             # throw an exception here when not testing
-            self.total_earn_hist_dict = {}
-            for year in range(
-                    self.birthday.year + SSEarnings.start_max_income_age,
-                    self.current_year):
-                self.total_earn_hist_dict[year] = \
-                    self.config.get_max_ss_wage(year)
-        else:
-            self.total_earn_hist_dict = {}
+            start = SSEarnings.start_max_income_age
+            self.total_earn_hist[start:self.hist_end] = \
+                self.max_ss_wage_arr[start:self.hist_end]
 
-        for year in range(self.birthday.year, self.current_year):
-            if year not in self.total_earn_hist_dict:
-                self.ss_earn_hist_dict[year] = 0.0
-            else:
-                # in case items in the income history provided are higher
-                # than the maximum wage limit
-                max_wage = self.config.get_max_ss_wage(year)
-                self.ss_earn_hist_dict[year] = \
-                    min(self.total_earn_hist_dict[year], max_wage)
-#                if self.total_earn_hist_dict[year] > max_wage:
-#                    print("knocked down ss_earn_hist ({}) to max wage ({})"
-#                          .format(self.total_earn_hist_dict[year], max_wage))
-#                    print("for year {}".format(year))
+        # in case items in the income history provided are higher
+        # than the maximum wage limit
+        np.minimum(self.total_earn_hist[:self.hist_end],
+                   self.max_ss_wage_arr[:self.hist_end],
+                   out=self.ss_earn_hist[:self.hist_end])
 
     def _set_income_future_by_profile(self, income_future):
         """
@@ -525,32 +643,20 @@ class SSEarnings:
         None.
 
         """
-        if isinstance(income_future, pd.Series):
-            self.total_earn_future_dict = income_future.dropna().to_dict()
-        elif isinstance(income_future, dict):
-            self.total_earn_future_dict = income_future.copy()
-        elif isinstance(income_future, list):
-            # must be indexed from 0 (current year)
-            self.total_earn_future_dict = {}
-            for index, income in enumerate(income_future):
-                self.total_earn_future_dict[index + self.current_year] = \
-                    income
-        elif income_future == "use_max":
+        if isinstance(income_future, (pd.Series, dict, list)):
+            # a list must be indexed from 0 (current year)
+            _series_to_array(income_future, self.year0,
+                             len(self.total_earn_future),
+                             list_year=self.current_year,
+                             out=self.total_earn_future)
+        else:
+            self.total_earn_future.fill(0.0)
+        if isinstance(income_future, str) and income_future == "use_max":
             # income_history None should only be used for testing purposes
             # throw an exception here when not testing
-            self.total_earn_future_dict = {}
-            for year in range(
-                    self.birthday.year + SSEarnings.start_max_income_age,
-                    self.current_year()):
-                self.total_earn_future_dict[year] = \
-                    self.config.get_max_ss_wage(year)
-        else:
-            self.total_earn_future_dict = {}
-
-        final_income_year = self.current_year + SS_LIFESPAN
-        for year in range(self.current_year, final_income_year+1):
-            if year not in self.total_earn_future_dict:
-                self.total_earn_future_dict[year] = 0.0
+            start = SSEarnings.start_max_income_age
+            self.total_earn_future[start:self.hist_end] = \
+                self.max_ss_wage_arr[start:self.hist_end]
 
         self._set_ss_income_future()
 
@@ -577,42 +683,45 @@ class SSEarnings:
 
         """
         self._set_personal_wage_growth(pwg)
+        # no income after final_income_year, nor left over from a previous
+        # future income profile
+        self.total_earn_future.fill(0.0)
+        income_end = 0
         if next_income_year is not None:
-            if next_income_amount == 'extrapolate':
-                #                print(next_income_year)
-                prev_year = next_income_year - 1
-                if prev_year in self.total_earn_hist_dict:
-                    next_income = (self.total_earn_hist_dict[prev_year]
-                                   * (1 + self.pwg_dict[next_income_year]))
-                else:
-                    next_income = 0.0
-            elif next_income_amount == 'use_max':
-                next_income = self.config.get_max_ss_wage(next_income_year)
+            start = next_income_year - self.year0
+            end = min(final_income_year - self.year0 + 1,
+                      len(self.total_earn_future))
+            income_end = max(end, start + 1)
+            if next_income_amount == 'use_max':
+                self.total_earn_future[start:income_end] = \
+                    self.max_ss_wage_arr[start:income_end]
             else:
-                next_income = next_income_amount
-            self.total_earn_future_dict[next_income_year] = next_income
-            for year in range(next_income_year+1, final_income_year+1):
-                if next_income_amount == 'use_max':
-                    next_income = self.config.get_max_ss_wage(year)
-                else:
-                    prev_year = year - 1
-                    if prev_year in self.total_earn_future_dict:
-                        next_income = (self.total_earn_future_dict[prev_year]
-                                       * (1 + self.pwg_dict[year]))
+                if next_income_amount == 'extrapolate':
+                    #                print(next_income_year)
+                    prev = start - 1
+                    if 0 <= prev < len(self.total_earn_hist):
+                        next_income = (self.total_earn_hist[prev]
+                                       * (1 + self.pwg[start]))
                     else:
                         next_income = 0.0
-                self.total_earn_future_dict[year] = next_income
-
-        for year in range(self.current_year, final_income_year+1):
-            if year not in self.total_earn_future_dict:
-                self.total_earn_future_dict[year] = 0.0
-
-        self._set_ss_income_future()
+                else:
+                    next_income = next_income_amount
+                # each year's income is the previous year's grown by the
+                # personal wage growth. A running product starting from
+                # next_income multiplies in the same order as doing it year
+                # by year, so it is run in place over the growth factors.
+                future = self.total_earn_future[start:income_end]
+                future[0] = next_income
+                np.add(self.pwg[start + 1:income_end], 1.0, out=future[1:])
+                np.multiply.accumulate(future, out=future)
+
+        # nothing to cap after the last year of income
+        self._set_ss_income_future(income_end)
 
     def _set_earn_all(self):
         """
         Internal routine that combines historical and future earnings into
-        consolidated dictionaries for ease of lookup
+        consolidated arrays for ease of lookup
 
         Returns
         -------
@@ -621,21 +730,24 @@ class SSEarnings:
         """
         # if there is overlap, history takes precedence
         # should probably issue a warning or just assert if there's a conflict
-        for year in self.ss_earn_future_dict:
-            self.ss_earn_all_dict[year] = self.ss_earn_future_dict[year]
-        for year in self.ss_earn_hist_dict:
-            self.ss_earn_all_dict[year] = self.ss_earn_hist_dict[year]
+        np.copyto(self.ss_earn_all, self.ss_earn_future)
+        self.ss_earn_all[:self.hist_end] = self.ss_earn_hist[:self.hist_end]
 
         # if there is overlap, history takes precedence
         # should probably issue a warning or just assert if there's a conflict
-        for year in self.total_earn_future_dict:
-            self.total_earn_all_dict[year] = self.total_earn_future_dict[year]
-        for year in self.ss_earn_hist_dict:
-            self.total_earn_all_dict[year] = self.ss_earn_hist_dict[year]
+        # The history here is deliberately the social security earnings, see
+        # the note on total_earn_all in the constructor. Those already
+        # retired are prorated on their accurate social security earnings.
+        np.copyto(self.total_earn_all, self.total_earn_future)
+        self.total_earn_all[:self.hist_end] = \
+            self.ss_earn_hist[:self.hist_end]
+
+        np.multiply(self.ss_earn_all, self.index_factor,
+                    out=self.indexed_earn_all)
 
     def _set_personal_wage_growth(self, pwg):
         """
-        Internal routine that sets the pwg_dict based on the passed in
+        Internal routine that sets the pwg array based on the passed in
         personal wage growth
 
         Parameters
@@ -649,31 +761,20 @@ class SSEarnings:
 
         Side effects
         ------------
-        Sets the pwg_dict object variable
+        Sets the pwg object variable
 
         """
-        end_lifespan = self.birthday.year + SS_LIFESPAN
-        if isinstance(pwg, pd.Series):
-            self.pwg_dict = pwg.dropna().to_dict()
-        elif isinstance(pwg, dict):
-            self.pwg_dict = pwg.copy()
-        elif isinstance(pwg, list):
-            # must be indexed from 0 (current year),
+        if isinstance(pwg, (pd.Series, dict, list)):
+            # a list must be indexed from 0 (current year),
             # end in birthday.year + ss_lifespan - 1
-            self.ss_earn_hist_dict = {}
-            for index, income in enumerate(pwg):
-                self.pwg_dict[index + self.current_year] = income
+            _series_to_array(pwg, self.year0, len(self.pwg),
+                             list_year=self.current_year, out=self.pwg)
         else:
-            self.pwg_dict = {}
-            for year in range(self.birthday.year, end_lifespan+1):
-                self.pwg_dict[year] = pwg
-        for year in range(self.birthday.year, end_lifespan+1):
-            if year not in self.pwg_dict:
-                self.pwg_dict[year] = 0.0
+            self.pwg.fill(float(pwg))
 
     def _set_retirement(self):
         """
-        Internal routine to set the dictionary for the income up to retirement
+        Internal routine to set the arrays for the income up to retirement
         age.
 
         For income during your retirement year, we assume that you will stop
@@ -685,37 +786,33 @@ class SSEarnings:
 
         Side Effects
         ------------
-        Sets total_earn_to_retire_dict and ss_earn_to_retire_dict
+        Sets total_earn_to_retire and ss_earn_to_retire
 
         """
 
-        self.total_earn_to_retire_dict = self.total_earn_all_dict.copy()
-        self.ss_earn_to_retire_dict = self.ss_earn_all_dict.copy()
-        retire_start_date = (self.benefit_birthday
-                             + relativedelta(years=self.retire_age_years,
-                                             months=self.retire_age_months,
-                                             day=1))
-        retire_year = retire_start_date.year
-        retire_month = retire_start_date.month
-        final_income_year = self.birthday.year + SS_LIFESPAN
-        for year in range(retire_year, final_income_year+1):
-            if year in self.total_earn_to_retire_dict:
-                assert year in self.ss_earn_to_retire_dict
-                if year == retire_year:
-                    partial_income = float(math.floor(
-                        (self.total_earn_all_dict[year]
-                         * (retire_month - 1) / 12.0)))
-                    self.total_earn_to_retire_dict[year] = partial_income
-                    self.ss_earn_to_retire_dict[year] = \
-                        min(self.ss_earn_to_retire_dict[year], partial_income)
-                else:
-                    self.total_earn_to_retire_dict[year] = 0.0
-                    self.ss_earn_to_retire_dict[year] = 0.0
-            else:
-                self.total_earn_to_retire_dict[year] = 0.0
-                self.ss_earn_to_retire_dict[year] = 0.0
-
-#        print(self.ss_earn_to_retire_dict)
+        # retirement starts on the first of the month the worker reaches the
+        # retirement age
+        retire_year, retire_month = divmod(
+            self.birth_months + self.retire_age_years * 12
+            + self.retire_age_months, 12)
+        retire_month += 1
+        retire = retire_year - self.year0
+        self.retire_index = retire
+        # only the years before retirement are copied, the earnings are
+        # prorated for the retirement year and nothing is earned after
+        end = min(retire, len(self.total_earn_to_retire))
+        self.total_earn_to_retire[:end] = self.total_earn_all[:end]
+        self.ss_earn_to_retire[:end] = self.ss_earn_all[:end]
+        self.total_earn_to_retire[end:] = 0.0
+        self.ss_earn_to_retire[end:] = 0.0
+        if retire < len(self.total_earn_to_retire):
+            partial_income = float(math.floor(
+                (self.total_earn_all[retire] * (retire_month - 1) / 12.0)))
+            self.total_earn_to_retire[retire] = partial_income
+            self.ss_earn_to_retire[retire] = \
+                min(self.ss_earn_all[retire], partial_income)
+
+#        print(self.ss_earn_to_retire)
 
     def _calc_aime(self):
         """
@@ -734,12 +831,14 @@ class SSEarnings:
 
         """
         # compute the income normalized to wage inflation (AWI)
-        indexed_income = {}
-        for year, income in self.ss_earn_to_retire_dict.items():
-            if year in self.index_factor:
-                indexed_income[year] = income * self.index_factor[year]
-            else:
-                indexed_income[year] = 0.0
+        # only the retirement year differs from the indexed earnings without
+        # retirement, as nothing is earned after it
+        indexed_income = self.indexed_earn_all.copy()
+        retire = self.retire_index
+        if retire < len(indexed_income):
+            indexed_income[retire] = (self.ss_earn_to_retire[retire]
+                                      * self.index_factor[retire])
+            indexed_income[retire + 1:] = 0.0
 
         # make a list out of the income for each year and sort it to reach
         # the maximum income for the number of years based on birth year
@@ -751,10 +850,14 @@ class SSEarnings:
         # will increase as long as their income keeps going up
         # However, this increase may not be very much if the 35th-highest
         # income year (indexed to wage inflation) is close to the new earnings
-        indexed_income_list = indexed_income.values()
-        max_years = self.worker.get_max_inc_years()
-        sorted_indexed_income = \
-            sorted(indexed_income_list, reverse=True)[:max_years]
+        # np.partition picks out the highest years without sorting them all,
+        # they are then summed from the highest down, as the total depends
+        # on the order of the sum
+        max_years = self.max_years
+        if max_years < len(indexed_income):
+            indexed_income = np.partition(
+                indexed_income, len(indexed_income) - max_years)[-max_years:]
+        sorted_indexed_income = sorted(indexed_income.tolist(), reverse=True)
 
         # compute the monthly average income, rounded down to the whole dollar
         self.aime = math.floor(
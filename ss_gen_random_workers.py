@@ -5,15 +5,22 @@ Created on Tue Nov 30 03:32:56 2021
 
 @author: dfox
 """
+from concurrent.futures import ProcessPoolExecutor
 import datetime as dt
+from itertools import repeat
 import math
 import os
+import numpy as np
 import pandas as pd
-import random
 import socialsecurity as ss
 
+WAGE_TABLE_BASE_YEAR = 1937  # first year of the wage tables
+WAGE_TABLE_YEARS = 200  # well past the latest generated work start year
+BIRTHDAY_START_DATE = dt.date(1924, 1, 2)  # earliest generated birthday
+BIRTHDAY_END_DATE = dt.date(2000, 1, 2)  # generated birthdays are before
 
-def gen_random_date(start_date, end_date):
+
+def gen_random_date(start_date, end_date, rng=None):
     """
     Generates a random date within the date range from start_date (inclusive)
     to end_date (exclusive)
@@ -26,6 +33,9 @@ def gen_random_date(start_date, end_date):
     end_date : datetime.date
         The end of the range (exclusive) of dates from which to choose a random
         date.
+    rng : numpy.random.Generator, optional
+        The random number generator to use. The default is None, which means
+        a new, unseeded one.
 
     Returns
     -------
@@ -35,32 +45,72 @@ def gen_random_date(start_date, end_date):
     """
     time_between_dates = end_date - start_date
     days_between_dates = time_between_dates.days
-    random_number_of_days = random.randrange(days_between_dates)
+    if rng is None:
+        rng = np.random.default_rng()
+    random_number_of_days = int(rng.integers(days_between_dates))
     random_date = start_date + dt.timedelta(days=random_number_of_days)
     return random_date
 
 
-def gen_random_earnings_history(ssconfig, birthday):
+def gen_wage_tables(ssconfig):
+    """
+    Looks up the AWI and maximum wage for every year the generated earnings
+    can use, so they are not looked up for each worker and year.
+
+    Parameters
+    ----------
+    ssconfig : SSConfig
+        The social security configuration.
+
+    Returns
+    -------
+    wage_tables : dict
+        'awi' and 'max_wage' are lists of the AWI and maximum wage, indexed
+        by year - WAGE_TABLE_BASE_YEAR, for WAGE_TABLE_YEARS years. Years
+        past the current year are projections.
+        'awi_growth' is the AWI growth from each year to the next, or NaN if
+        either year has no AWI.
+
+    """
+    years = range(WAGE_TABLE_BASE_YEAR,
+                  WAGE_TABLE_BASE_YEAR + WAGE_TABLE_YEARS)
+    awi = np.array([ssconfig.get_awi_value(year) for year in years])
+    max_wage = np.array([ssconfig.get_max_ss_wage(year) for year in years])
+    awi_growth = np.full(len(awi), np.nan)
+    known = (awi[:-1] != 0.0) & (awi[1:] != 0.0)
+    awi_growth[:-1][known] = (awi[1:][known] / awi[:-1][known]) - 1
+    return {'awi': awi.tolist(), 'awi_growth': awi_growth.tolist(),
+            'max_wage': max_wage.tolist()}
+
+
+def gen_random_earnings_history(ssconfig, birthday, wage_tables=None,
+                                rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
+    if wage_tables is None:
+        wage_tables = gen_wage_tables(ssconfig)
+    awi = wage_tables['awi']
+    awi_growth = wage_tables['awi_growth']
     ss_birthday = birthday - dt.timedelta(days=1)
-    start_base = random.randrange(100)
+    start_base = int(rng.integers(100))
     if start_base < 66:
         start_age = 18
-        start_fraction = random.randrange(30, 120) / 100.0
+        start_fraction = int(rng.integers(30, 120)) / 100.0
     elif start_base < 87:
         start_age = 22
-        start_fraction = random.randrange(70, 200) / 100.0
+        start_fraction = int(rng.integers(70, 200)) / 100.0
     elif start_base < 97:
         start_age = 24
-        start_fraction = random.randrange(140, 250) / 100.0
+        start_fraction = int(rng.integers(140, 250)) / 100.0
     else:
         start_age = 29
-        start_fraction = random.randrange(200, 1000) / 100.0
-    pwg = random.randrange(20, 50) / 1000.0
-    retire_age = random.randrange(62, 76)
+        start_fraction = int(rng.integers(200, 1000)) / 100.0
+    pwg = int(rng.integers(20, 50)) / 1000.0
+    retire_age = int(rng.integers(62, 76))
     if retire_age == 75:
-        retire_age = random.randrange(75, 86)
+        retire_age = int(rng.integers(75, 86))
     if retire_age == 85:
-        retire_age = random.randrange(85, 95)
+        retire_age = int(rng.integers(85, 95))
     if ss_birthday.month == 2 and ss_birthday.day == 29 and start_age % 4 != 0:
         start_date = dt.date(ss_birthday.year + start_age, 3, 1)
     else:
@@ -73,17 +123,55 @@ def gen_random_earnings_history(ssconfig, birthday):
         end_date = dt.date(ss_birthday.year + retire_age, ss_birthday.month,
                            ss_birthday.day)
     stop_year = end_date.year
-    if stop_year >= ssconfig.get_current_year():
-        stop_year = ssconfig.get_current_year() - 1
-    base_value = ssconfig.get_awi_value(start_date.year)
+    current_year = ssconfig.get_current_year()
+    if stop_year >= current_year:
+        stop_year = current_year - 1
+    base_value = awi[start_date.year - WAGE_TABLE_BASE_YEAR]
     if base_value == 0.0:
-        base_value = ssconfig.get_max_ss_wage(start_date.year)
+        base_value = \
+            wage_tables['max_wage'][start_date.year - WAGE_TABLE_BASE_YEAR]
     start_wage = math.floor(start_fraction * base_value)
 
+    # one draw for all the years
+    gap_bases = rng.integers(100, size=max(stop_year + 1 - start_date.year,
+                                           0)).tolist()
+    earnings = _gen_earnings(start_date, end_date, start_wage, pwg,
+                             awi_growth, gap_bases)
+
+    return earnings, start_date, end_date, pwg
+
+
+def _gen_earnings(start_date, end_date, start_wage, pwg, awi_growth,
+                  gap_bases):
+    """
+    Internal routine that grows the starting wage year by year from the
+    start date. Only uses numbers, so the random draws are made beforehand.
+
+    Parameters
+    ----------
+    start_date : datetime.date
+        The date the worker starts working.
+    end_date : datetime.date
+        The date the worker retires.
+    start_wage : int
+        The annual wage in the first year.
+    pwg : float
+        The worker's wage growth, relative to an AWI growth of 3.5%.
+    awi_growth : list of float
+        See 'awi_growth' returned by gen_wage_tables.
+    gap_bases : list of int
+        A random number from 0 to 99 for each year from the start date's
+        year. Years with a number under 4 have no earnings.
+
+    Returns
+    -------
+    earnings : dict
+        The earnings, hashed by year. Years with no earnings are left out.
+
+    """
     earnings = {}
     next_wage = start_wage
-    for year in range(start_date.year, stop_year+1):
-        gap_base = random.randrange(100)
+    for year, gap_base in enumerate(gap_bases, start_date.year):
         if gap_base < 4:
             continue
         if year == start_date.year:
@@ -93,40 +181,42 @@ def gen_random_earnings_history(ssconfig, birthday):
         else:
             earnings[year] = int(next_wage)
             assert earnings[year] != 0
-        if (ssconfig.get_awi_value(year) != 0.0
-                and ssconfig.get_awi_value(year+1) != 0.0):
-            awi_growth = (ssconfig.get_awi_value(year+1)
-                          / ssconfig.get_awi_value(year)) - 1
-            npwg = pwg * awi_growth / 0.035
+        growth = awi_growth[year - WAGE_TABLE_BASE_YEAR]
+        if not math.isnan(growth):
+            npwg = pwg * growth / 0.035
         else:
             npwg = pwg
         next_wage = int(next_wage * (1.0 + npwg))
 
-    return earnings, start_date, end_date, pwg
+    return earnings
 
 
-def gen_random_worker(ssconfig, name):
+def gen_random_worker(ssconfig, name, wage_tables=None, rng=None,
+                      birthday=None):
+    if rng is None:
+        rng = np.random.default_rng()
     worker = {}
     current_year = ssconfig.get_current_year()
-    rand_start_date = dt.date(1924, 1, 2)
-    rand_end_date = dt.date(2000, 1, 2)
-    birthday = gen_random_date(rand_start_date, rand_end_date)
+    if birthday is None:
+        birthday = gen_random_date(BIRTHDAY_START_DATE, BIRTHDAY_END_DATE,
+                                   rng)
     earnings, start_date, retire_date, pwg = \
-        gen_random_earnings_history(ssconfig, birthday)
+        gen_random_earnings_history(ssconfig, birthday, wage_tables, rng)
 
-    earnings_new = {}
-    for year in range(rand_start_date.year, current_year):
-        if year not in earnings:
-            earnings_new[year] = 0
-        else:
-            earnings_new[year] = earnings[year]
+    # the earnings for every year from the earliest possible birth year up
+    # to the current year, 0 for the years not worked
+    years = range(BIRTHDAY_START_DATE.year, current_year)
+    earnings_new = np.zeros(len(years), dtype=np.int64)
+    earnings_new[np.fromiter(earnings.keys(), dtype=np.int64,
+                             count=len(earnings)) - years.start] = \
+        list(earnings.values())
 
     if start_date.year >= current_year:
         next_income_year = start_date.year
     elif retire_date.year < current_year:
         next_income_year = None
     else:
-        gap_base = random.randrange(100)
+        gap_base = int(rng.integers(100))
         if gap_base < 4:
             next_income_year = current_year + 1
         else:
@@ -140,38 +230,63 @@ def gen_random_worker(ssconfig, name):
     worker['Next_Income_Year'] = next_income_year
     worker['Next_Income_Amount'] = next_income_amount
 
-    return worker, earnings_new
+    return worker, years, earnings_new
+
 
+def gen_random_personal_data(max_workers=None):
+    """
+    Generates 1000 random workers and their earnings, and saves them to
+    SS_worker_test_data.csv and SS_worker_test_earnings.csv.
+
+    Each worker has its own random number stream, spawned from the seed 423,
+    so the workers are the same however many processes generate them. The
+    birthdays are all drawn at once from one more stream.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        The number of processes to generate the workers in. The default is
+        None, which means generate them all in this process.
 
-def gen_random_personal_data():
+    Returns
+    -------
+    None.
+
+    """
     ssconfig = ss.SSConfig()
-    workers = []
-    earnings_list = []
-    random.seed(423)
-    for index in range(1000):
-        worker, earnings = gen_random_worker(ssconfig,
-                                             'Worker_{}'.format(index))
-        workers.append(worker)
-        earnings_list.append(earnings)
+    wage_tables = gen_wage_tables(ssconfig)
+    count = 1000
+    names = ['Worker_{}'.format(index) for index in range(count)]
+    seeds = np.random.SeedSequence(423).spawn(count + 1)
+    rngs = [np.random.default_rng(seed) for seed in seeds[:count]]
+    days = (BIRTHDAY_END_DATE - BIRTHDAY_START_DATE).days
+    birthdays = [BIRTHDAY_START_DATE + dt.timedelta(days=offset)
+                 for offset in np.random.default_rng(seeds[count]).integers(
+                     days, size=count).tolist()]
+    args = (repeat(ssconfig), names, repeat(wage_tables), rngs, birthdays)
+    if max_workers is None:
+        results = list(map(gen_random_worker, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(gen_random_worker, *args,
+                                        chunksize=count // max_workers + 1))
+    workers = [worker for worker, years, earnings in results]
+    earnings_list = [earnings for worker, years, earnings in results]
+    years = results[0][1]
     worker_cols = [key for key in workers[0]]
-    earnings_cols = ['Year']
-    earnings_cols.extend([worker['Worker'] for worker in workers])
-    wdf = pd.DataFrame()
-    for worker in workers:
-        rec = [value for value in worker.values()]
-        recseries = pd.Series(rec, worker_cols)
-        wdf = wdf.append([recseries])
-    edf = pd.DataFrame(index=[key for key in earnings_list[0].keys()])
+    wdf = pd.DataFrame.from_records(workers, columns=worker_cols)
+    # every worker's earnings have the same years, so they are stacked into
+    # one block with a column for each worker
+    edf = pd.DataFrame(np.stack(earnings_list, axis=1), index=years,
+                       columns=[worker['Worker'] for worker in workers])
     edf.index.rename('Year', inplace=True)
-    for index, earnings in enumerate(earnings_list):
-        series = pd.Series(earnings, index=[key for key in earnings.keys()])
-        edf[workers[index]['Worker']] = series
 
     wdf.to_csv(os.path.join(".", "SS_worker_test_data.csv"), index=False)
     edf.to_csv(os.path.join(".", "SS_worker_test_earnings.csv"))
 
 
-now = dt.datetime.now()
-gen_random_personal_data()
-runtime = dt.datetime.now() - now
-print("gen_random_personal_data() SUCCESS runtime = {}".format(runtime))
+if __name__ == '__main__':
+    now = dt.datetime.now()
+    gen_random_personal_data()
+    runtime = dt.datetime.now() - now
+    print("gen_random_personal_data() SUCCESS runtime = {}".format(runtime))
@@ -9,10 +9,9 @@ Created on Sun Nov 28 04:45:06 2021.
 import datetime as dt
 import os
 import pandas as pd
-from dateutil.relativedelta import relativedelta
 import socialsecurity as ssc
 import ss_worker as ssw
-from pandas._testing import assert_frame_equal
+from pandas.testing import assert_frame_equal
 
 inc_hist_filename = os.path.join(".", "SS_worker_test_earnings_1000.csv")
 personal_filename = os.path.join(".", "SS_worker_test_data_1000.csv")
@@ -22,6 +21,37 @@ out_worker_test_filename = os.path.join(".",
                                         "SS_worker_test_output_1000.csv")
 SS_LIFESPAN = 130
 
+# SSConfig objects already built by _get_config, keyed by the projections
+_config_cache = {}
+
+
+def _get_config(cola_proj=None, ss_wage_growth=None):
+    """
+    Get an SSConfig for the given projections, built only the first time.
+
+    The tests only read from the configuration, so it is shared between
+    test runs.
+
+    Parameters
+    ----------
+    cola_proj : float, optional
+        See 'cola_proj' keyword in SSConfig. The default is None.
+    ss_wage_growth : float, optional
+        See 'ss_wage_growth' keyword in SSConfig. The default is None.
+
+    Returns
+    -------
+    ss : SSConfig
+        The configuration.
+
+    """
+    key = (cola_proj, ss_wage_growth)
+    ss = _config_cache.get(key)
+    if ss is None:
+        ss = ssc.SSConfig(cola_proj=cola_proj, ss_wage_growth=ss_wage_growth)
+        _config_cache[key] = ss
+    return ss
+
 
 def max_income_test(start_year, final_year):
     """
@@ -58,9 +88,14 @@ def max_income_test(start_year, final_year):
                'Initial_67_0', 'In_2022_67_0', 'AIME_70_0', 'Initial_70_0',
                'In_2022_70_0']
 
-    df = pd.DataFrame()
+    rows = []
+
+    ss = _get_config(cola_proj=0.024, ss_wage_growth=0.036)
 
-    ss = ssc.SSConfig(cola_proj=0.024, ss_wage_growth=0.036)
+    # The same birthday comes up for different retirement ages in different
+    # years, and the earnings only depend on the birthday, so one worker is
+    # kept for each birthday and reset to each retirement age.
+    workers = {}
 
     for retire_year in range(start_year, final_year+1):
         stats = {}
@@ -68,8 +103,11 @@ def max_income_test(start_year, final_year):
         for retire_age in [(62, 1), (65, 0), (66, 0), (67, 0), (70, 0)]:
             birthday = dt.date(retire_year - retire_age[0], 1, 3)
 
-            worker = ssw.SSWorker(ss, "Max_Income_Test", birthday, 'use_max',
-                                  next_income_aount='use_max')
+            worker = workers.get(birthday)
+            if worker is None:
+                worker = ssw.SSWorker(ss, "Max_Income_Test", birthday,
+                                      'use_max', next_income_aount='use_max')
+                workers[birthday] = worker
 
             worker.reset_retirement_age(retire_age[0], retire_age[1])
             worker.reset_collection_start_age(retire_age[0], retire_age[1])
@@ -84,11 +122,8 @@ def max_income_test(start_year, final_year):
             stats['In_{}_{}_{}'.format(final_year, retire_age[0],
                                        retire_age[1])] = mo_benefit_at_2022
 
-        rec = [value for value in stats.values()]
-        reccols = [key for key in stats]
-        recseries = pd.Series(rec, reccols)
-        df = df.append([recseries])
-    return df
+        rows.append(stats)
+    return pd.DataFrame(rows)
 
 
 def generate_max_income_test():
@@ -141,15 +176,8 @@ def assert_test_equal_df(lhs, rhs):
     None.
 
     """
-    lhs_c = lhs.copy()
-    rhs_c = rhs.copy()
-    for col in lhs_c:
-        if lhs_c[col].dtype is dt.date:
-            lhs_c[col] = lhs_c[col].astype(str)
-    for col in rhs_c:
-        if rhs_c[col].dtype is dt.date:
-            rhs_c[col] = rhs_c[col].astype(str)
-    assert_frame_equal(lhs_c, rhs_c)
+    # neither table has date columns, so they are compared as they are
+    assert_frame_equal(lhs, rhs)
 
 
 def regression_max_income_test():
@@ -193,38 +221,47 @@ def worker_earnings_test():
         accurate run for regression testing.
 
     """
-    df = pd.DataFrame()
+    rows = []
 
-    ssconf = ssc.SSConfig()
+    ssconf = _get_config()
     current_year = ssconf.get_current_year()
 
     pddf = pd.read_csv(personal_filename)
     pddf['Birthday'] = pddf['Birthday'].apply(pd.to_datetime)
 
-    for index, row in pddf.iterrows():
-        # each row is a worker
-        worker = row['Worker']
-
-        birthday = row['Birthday']
-
-        wihdf = pd.read_csv(inc_hist_filename)
-        wihdf.sort_values('Year')
-        wihdf.set_index('Year', drop=True, inplace=True)
-
-        if ('Next_Income_Year' in row
-                and row['Next_Income_Year'] != 'Next_Year'):
-            if pd.isnull(row['Next_Income_Year']):
+    # the earnings of every worker, one column each
+    wihdf = pd.read_csv(inc_hist_filename)
+    wihdf = wihdf.sort_values('Year')
+    wihdf.set_index('Year', drop=True, inplace=True)
+
+    # each row is a worker, the columns are taken out once rather than
+    # boxing every row into a Series. Missing optional columns mean the
+    # default for every worker.
+    if 'Next_Income_Year' in pddf:
+        next_income_years = pddf['Next_Income_Year'].tolist()
+    else:
+        next_income_years = ['Next_Year'] * len(pddf)
+    if 'Next_Income_Amount' in pddf:
+        next_income_amounts = pddf['Next_Income_Amount'].tolist()
+    else:
+        next_income_amounts = ['Use_Last'] * len(pddf)
+
+    for (worker, birthday, next_income_year_col, personal_wage_growth,
+         next_income_amount_col) in zip(pddf['Worker'].tolist(),
+                                        pddf['Birthday'].tolist(),
+                                        next_income_years,
+                                        pddf['Annual_Wage_Growth'].tolist(),
+                                        next_income_amounts):
+        if next_income_year_col != 'Next_Year':
+            if pd.isnull(next_income_year_col):
                 next_income_year = None
             else:
-                next_income_year = int(row['Next_Income_Year'])
+                next_income_year = int(next_income_year_col)
         else:
             next_income_year = 'current_year'
 
-        personal_wage_growth = row['Annual_Wage_Growth']
-
-        if ('Next_Income_Amount' in row
-                and row['Next_Income_Amount'] != 'Use_Last'):
-            next_income_amount = row['Next_Income_Amount']
+        if next_income_amount_col != 'Use_Last':
+            next_income_amount = next_income_amount_col
         else:
             next_income_amount = 'extrapolate'
 
@@ -237,15 +274,15 @@ def worker_earnings_test():
         for retire_age in [(62, 1), (65, 0), (66, 0), (67, 0), (70, 0)]:
             ssworker.reset_retirement_age(retire_age[0], retire_age[1])
             ssworker.reset_collection_start_age(retire_age[0], retire_age[1])
-            benefit_start_date = (ssworker.get_calc_benefit_birthday()
-                                  + relativedelta(years=retire_age[0],
-                                                  months=retire_age[1],
-                                                  day=1))
-            mo_benefit = ssworker.get_mo_benefit((benefit_start_date.year+1,
-                                                  1))
+            # only the year benefits start is needed, not the whole date
+            benefit_birthday = ssworker.get_calc_benefit_birthday()
+            benefit_start_year = (benefit_birthday.year + retire_age[0]
+                                  + (benefit_birthday.month - 1
+                                     + retire_age[1]) // 12)
+            mo_benefit = ssworker.get_mo_benefit((benefit_start_year+1, 1))
             mo_benefit_current_dollars = \
                 int(ssconf.value_in_current_dollars(mo_benefit,
-                                                    benefit_start_date.year+1))
+                                                    benefit_start_year+1))
             aime, base_benefit, bp1, bp2 = ssworker.get_benefit_info()
 
             stats['AIME_{}_{}'.format(retire_age[0], retire_age[1])] = aime
@@ -259,11 +296,8 @@ def worker_earnings_test():
                                                  current_year)] = \
                 mo_benefit_current_dollars
 
-        rec = [value for value in stats.values()]
-        reccols = [key for key in stats]
-        recseries = pd.Series(rec, reccols)
-        df = df.append([recseries])
-    return df
+        rows.append(stats)
+    return pd.DataFrame(rows)
 
 
 def generate_worker_earnings_test():
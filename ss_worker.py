@@ -6,11 +6,23 @@ Created on Fri Sep 10 02:11:23 2021
 """
 
 import datetime as dt
-import math
-from dateutil.relativedelta import relativedelta
+import numpy as np
 import ss_earnings as sse
 
 SS_BENEFIT_AGE = 62
+# number of benefit years cached for each worker, from age 62 through the
+# end of the lifespan
+_BENEFIT_YEARS = sse.SS_LIFESPAN - SS_BENEFIT_AGE + 1
+
+# The yearly increase of the benefit multiplier past FRA for each birth
+# year from _BASE_MULT_MIN_YEAR, see _compute_base_mult. Earlier and later
+# birth years use the first and last values.
+_BASE_MULT_MIN_YEAR = 1924
+_BASE_MULT = (0.030, 0.035, 0.035, 0.040, 0.040,
+              0.045, 0.045, 0.050, 0.050,
+              0.055, 0.055, 0.060, 0.060,
+              0.065, 0.065, 0.070, 0.070,
+              0.075, 0.075, 0.080)
 
 
 def _sub_tuple(lhs, rhs, base):
@@ -46,6 +58,11 @@ def _sub_years_months(lhs, rhs):
     """
     Subtracts time period values expressed as a tuple of (years, months)
 
+    Note that the benefit calculations no longer use this, they work with
+    ages expressed as a whole number of months instead (see
+    _calc_benefit_multiplier). It is kept for callers that work with
+    (years, months) tuples.
+
     Parameters
     ----------
     lhs : tuple: (int, int)
@@ -69,6 +86,123 @@ def _sub_years_months(lhs, rhs):
     return _sub_tuple(lhs, rhs, 12)
 
 
+# cache of _compute_fra, hashed by birth year
+_fra_cache = {}
+
+
+def _compute_fra(birth_year):
+    """
+    Calculates Social Security Full Retirement Age (FRA) for a birth year.
+    The FRA is cached by birth year, so it is only calculated once for all
+    the workers born in the same year.
+
+    Parameters
+    ----------
+    birth_year : int
+        The birth year for SSA calculation purposes.
+
+    Returns
+    -------
+    tuple: (int, int)
+        Social Security Full Retirement Age (FRA): (years, months)
+
+    """
+    fra = _fra_cache.get(birth_year)
+    if fra is None:
+        if birth_year <= 1937:
+            fra = 65, 0
+        elif birth_year < 1943:
+            fra = 65, 2*(birth_year - 1937)
+        elif birth_year <= 1954:
+            fra = 66, 0
+        elif birth_year < 1960:
+            fra = 66, 2*(birth_year - 1954)
+        else:
+            fra = 67, 0
+        _fra_cache[birth_year] = fra
+    return fra
+
+
+def _compute_base_mult(birth_year):
+    """
+    Calculates the yearly increase of the benefit multiplier for each year
+    benefits are delayed past Full Retirement Age (FRA)
+
+    Parameters
+    ----------
+    birth_year : int
+        The birth year for SSA calculation purposes.
+
+    Returns
+    -------
+    float
+        The yearly increase of the benefit multiplier.
+
+    """
+    year = birth_year - _BASE_MULT_MIN_YEAR
+    if year < 0:
+        year = 0
+    elif year >= len(_BASE_MULT):
+        year = len(_BASE_MULT) - 1
+    return _BASE_MULT[year]
+
+
+def _calc_benefit_multiplier(start_months, fra_months, bp1_months, base_mult,
+                             day_is_one):
+    """
+    Calculates the benefit multiplier, see SSWorker.get_benefit_multiplier.
+    All ages are expressed as a whole number of months.
+
+    Parameters
+    ----------
+    start_months : int
+        Age the worker begins to collect benefits.
+    fra_months : int
+        Full Retirement Age (FRA).
+    bp1_months : int
+        Age three years before FRA, below which the reduction is smaller.
+    base_mult : float
+        The yearly increase of the multiplier past FRA, see _compute_base_mult
+    day_is_one : bool
+        Whether the worker's birthday for SSA calculation purposes is the
+        1st of the month.
+
+    Returns
+    -------
+    float
+        The multiplier.
+
+    """
+    if start_months >= 70*12:
+        start_months = 70*12
+
+    # kinda crazy, but if your birthday for calculation purposes in on the
+    # 1st of the month (which is the 2nd of the month of your actual
+    # birthday, BTW), then you can't retire at 62, 0, you must wait until
+    # 62, 1. That's right, *only* people born on the 2nd of a month can
+    # retire at 62 years, 0 months. The rest must wait until 62 years,
+    # 1 month
+    if start_months < 62*12:
+        return 0.0
+    if not day_is_one and start_months == 62*12:
+        return 0.0
+
+    # the (years, months) split is kept so the float results are
+    # identical to adding the years and months terms separately
+    above_fra = start_months - fra_months
+    if above_fra >= 0:
+        years, months = divmod(above_fra, 12)
+        return 1.0 + (base_mult * years) + (base_mult * months)/12
+
+    above_bp1 = start_months - bp1_months
+    if above_bp1 >= 0:
+        years, months = divmod(above_bp1, 12)
+        return 0.8 + 0.2*years/3 + 0.2*months/36
+
+    years, months = divmod(bp1_months - start_months, 12)
+    return 0.8 - 0.05*years - 0.05*months/12
+
+
 class SSWorker:
     """
     Class for managing and handling a social security worker. Each worker
@@ -80,6 +214,14 @@ class SSWorker:
     start_max_income_age = 22
     # this is used for testing and is not user-configurable
 
+    __slots__ = ('config', 'name', 'birthday', 'calc_benefit_birthday',
+                 '_fra', '_base_mult', '_fra_months', '_bp1_months',
+                 'collection_start_age', 'benefit_multiplier',
+                 '_benefit_start_year', '_benefit_start_month',
+                 '_ineligible_at_62_0', 'earnings', 'base_benefit', 'bp1',
+                 'bp2', '_cola_base_year', '_cola_arr', '_cola_count',
+                 '_mo_benefit_arr')
+
     def __init__(self, ss_config, name, birthday, income_history, **kwargs):
         """
 
@@ -120,6 +262,12 @@ class SSWorker:
 
         # birth date for benefit purposes goes back one day
         self.calc_benefit_birthday = birthday - dt.timedelta(days=1)
+        # the FRA depends only on the benefit birth year, which never changes
+        self._fra = _compute_fra(self.calc_benefit_birthday.year)
+        # constants for the benefit multiplier, see get_benefit_multiplier
+        self._base_mult = _compute_base_mult(self.calc_benefit_birthday.year)
+        self._fra_months = self._fra[0]*12 + self._fra[1]
+        self._bp1_months = self._fra_months - 3*12
 #        self.eligibility_birthday = birthday - dt.timedelta(days=2)
 
         """
@@ -138,10 +286,13 @@ class SSWorker:
 
         for key, value in kwargs.items():
             if key == 'collection_start_age':
-                self.collection_start_age = value
+                # stored as a tuple so lists compare the same, see
+                # _calc_benefit_start
+                self.collection_start_age = tuple(value)
 
         self.benefit_multiplier = self.get_benefit_multiplier(
             self.collection_start_age[0], self.collection_start_age[1])
+        self._calc_benefit_start()
 
         # first benefit year, based on calc_benefit_birthday NOT
         # eligibility_birthday
@@ -152,8 +303,6 @@ class SSWorker:
         self.earnings = sse.SSEarnings(self, income_history, **kwargs)
 
         self._calc_mo_base_benefit()
-        self.mo_benefit_cola = {}
-        self.mo_benefit = {}
 #        self._calc_mo_benefit(self.first_benefit_year)
 
     def get_max_inc_years(self):
@@ -207,8 +356,9 @@ class SSWorker:
 
     def get_fra(self):
         """
-        Calculates Social Security Full Retirement Age (FRA) for an individual
-        based on their year of birth
+        Returns Social Security Full Retirement Age (FRA) for an individual
+        based on their year of birth. This is calculated during instantiation
+        of this class, so it is always valid.
 
         Parameters
         ----------
@@ -220,16 +370,7 @@ class SSWorker:
             Social Security Full Retirement Age (FRA): (years, months)
 
         """
-        birth_year = self.calc_benefit_birthday.year
-        if birth_year <= 1937:
-            return 65, 0
-        if birth_year < 1943:
-            return 65, 2*(birth_year - 1937)
-        if birth_year <= 1954:
-            return 66, 0
-        if birth_year < 1960:
-            return 66, 2*(birth_year - 1954)
-        return 67, 0
+        return self._fra
 
     def get_aime(self):
         """
@@ -265,10 +406,7 @@ class SSWorker:
         Re-calculates the monthly base benefit
 
         """
-        self.mo_benefit_cola = {}
-        self.mo_benefit = {}
-        self.earnings.reset_retirement_age(retire_age_years, retire_age_months)
-        self._calc_mo_base_benefit()
+        self.reset(retirement_age=(retire_age_years, retire_age_months))
 #        self._calc_mo_benefit(self.first_benefit_year)
 
     def reset_income_future_by_profile(self, income_future):
@@ -292,10 +430,7 @@ class SSWorker:
         ------------
         Re-calculates the monthly base benefit
         """
-        self.mo_benefit_cola = {}
-        self.mo_benefit = {}
-        self.earnings.reset_income_future_by_profile(income_future)
-        self._calc_mo_base_benefit()
+        self.reset(income_future=income_future)
 #        self._calc_mo_benefit(self.first_benefit_year)
 
     def reset_income_future_by_next(self, next_income_year, next_income_amount,
@@ -331,13 +466,8 @@ class SSWorker:
         ------------
         Re-calculates the monthly base benefit
        """
-        self.mo_benefit_cola = {}
-        self.mo_benefit = {}
-        self.earnings.reset_income_future_by_next(next_income_year,
-                                                  next_income_amount,
-                                                  pwg,
-                                                  final_income_year)
-        self._calc_mo_base_benefit()
+        self.reset(income_future_next=(next_income_year, next_income_amount,
+                                       pwg, final_income_year))
 #        self._calc_mo_benefit(self.first_benefit_year)
 
     def reset_collection_start_age(self, collection_start_age_years,
@@ -360,32 +490,95 @@ class SSWorker:
 
         Side Effects
         ------------
-        Re-calculates the monthly base benefit
+        Re-calculates the monthly benefits
         """
-        self.mo_benefit_cola = {}
-        self.mo_benefit = {}
-        self.collection_start_age = (collection_start_age_years,
-                                     collection_start_age_months)
-#        print(self.collection_start_age)
-        self.benefit_multiplier = self.get_benefit_multiplier(
-            self.collection_start_age[0], self.collection_start_age[1])
-#        print(self.benefit_multiplier)
-#        self.first_benefit_year = (self.calc_benefit_birthday.year
-#                                   + self.collection_start_age[0] + 1)
-        self._calc_mo_base_benefit()
+        self.reset(collection_start_age=(collection_start_age_years,
+                                         collection_start_age_months))
 #        self._calc_mo_benefit(self.first_benefit_year)
 
-    def _calc_benefit_cola(self, benefit_year):
-        if len(self.mo_benefit_cola):
-            last_year_calc = max(self.mo_benefit_cola.keys())
-        else:
-            last_year_calc = self.calc_benefit_birthday.year + SS_BENEFIT_AGE
-            self.mo_benefit_cola[last_year_calc] = self.base_benefit
+    def reset(self, *, retirement_age=None, income_future=None,
+              income_future_next=None, collection_start_age=None):
+        """
+        Resets any of the retirement age, the worker's future income and the
+        age the worker starts to receive benefits at once, without needing to
+        re-instantiate this class. The benefits are re-calculated only once
+        for all of the changes, which makes studying the effects of changing
+        several of them together more efficient. Parameters that are None are
+        left unchanged.
+
+        Parameters
+        ----------
+        retirement_age : tuple: (int, int), optional
+            Retirement age in years, months. See reset_retirement_age.
+        income_future : pandas Series or dict or list, optional
+            See reset_income_future_by_profile.
+        income_future_next : tuple, optional
+            (next_income_year, next_income_amount, pwg, final_income_year)
+            See reset_income_future_by_next.
+            Cannot be used together with income_future.
+        collection_start_age : tuple: (int, int), optional
+            The age in years, months that the worker will being to receive
+            benefits. See reset_collection_start_age.
+
+        Returns
+        -------
+        None.
 
-        if last_year_calc < benefit_year:
-            for year in range(last_year_calc+1, benefit_year+1):
-                self.mo_benefit_cola[year] = self.config.ss_cola_adjust(
-                    self.mo_benefit_cola[year-1], year-1, year)
+        Side Effects
+        ------------
+        Re-calculates the monthly base benefit if the retirement age or
+        future income is reset, and the monthly benefits
+
+        """
+        if collection_start_age is not None:
+            self.collection_start_age = tuple(collection_start_age)
+            self.benefit_multiplier = self.get_benefit_multiplier(
+                self.collection_start_age[0], self.collection_start_age[1])
+            self._calc_benefit_start()
+
+        if (retirement_age is not None or income_future is not None
+                or income_future_next is not None):
+            self.earnings.reset_batch(retirement_age=retirement_age,
+                                      income_future=income_future,
+                                      income_future_next=income_future_next)
+            self._calc_mo_base_benefit()
+        elif collection_start_age is not None:
+            # the base benefit does not depend on the collection start age,
+            # only the benefits already calculated from it need the new
+            # multiplier
+            self._calc_mo_benefits(0, self._cola_count)
+
+    def _calc_benefit_cola(self, benefit_year):
+        """
+        Internal method for extending the COLA-adjusted base benefit
+        (self._cola_arr) and the monthly benefit (self._mo_benefit_arr)
+        through the benefit year.
+        See SSCOLA.ss_cola_adjust_years in ss_cola.py for more details
+        """
+        count = self._cola_count
+        end = benefit_year - self._cola_base_year + 1
+        if end <= count:
+            return
+        if end > len(self._cola_arr):
+            # past the lifespan, grow the arrays to fit
+            grow = end - len(self._cola_arr)
+            self._cola_arr = np.concatenate((self._cola_arr, np.zeros(grow)))
+            self._mo_benefit_arr = np.concatenate(
+                (self._mo_benefit_arr, np.zeros(grow, dtype=np.int64)))
+        self._cola_arr[count:end] = self.config.ss_cola_adjust_years(
+            float(self._cola_arr[count - 1]),
+            self._cola_base_year + count - 1, benefit_year)
+        self._cola_count = end
+        self._calc_mo_benefits(count, end)
+
+    def _calc_mo_benefits(self, start, end):
+        """
+        Internal method for calculating the monthly benefit, in whole dollars,
+        from the COLA-adjusted base benefit and the benefit multiplier, for
+        the years in self._cola_arr[start:end]
+        """
+        self._mo_benefit_arr[start:end] = np.floor(
+            self._cola_arr[start:end] * self.benefit_multiplier)
 
     def get_benefit_multiplier(self, ben_start_years, ben_start_months):
         """
@@ -415,53 +608,10 @@ class SSWorker:
         # TBD add a regression test that uses the entire range of birth
         # years and start age
 
-        start_age = (ben_start_years, ben_start_months)
-
-        if start_age >= (70, 0):
-            start_age = (70, 0)
-
-        # kinda crazy, but if your birthday for calculation purposes in on the
-        # 1st of the month (which is the 2nd of the month of your actual
-        # birthday, BTW), then you can't retire at 62, 0, you must wait until
-        # 62, 1. That's right, *only* people born on the 2nd of a month can
-        # retire at 62 years, 0 months. The rest must wait until 62 years,
-        # 1 month
-        if start_age < (62, 0):
-            return 0.0
-        if self.calc_benefit_birthday.day != 1 and start_age == (62, 0):
-            return 0.0
-
-        birth_year = self.calc_benefit_birthday.year
-        fra = self.get_fra()
-
-        base_mult_dict = {
-            1924: 0.030, 1925: 0.035, 1926: 0.035, 1927: 0.040, 1928: 0.040,
-            1929: 0.045, 1930: 0.045, 1931: 0.050, 1932: 0.050,
-            1933: 0.055, 1934: 0.055, 1935: 0.060, 1936: 0.060,
-            1937: 0.065, 1938: 0.065, 1939: 0.070, 1940: 0.070,
-            1941: 0.075, 1942: 0.075, 1943: 0.080
-            }
-
-        if birth_year in base_mult_dict:
-            base_mult = base_mult_dict[birth_year]
-        elif birth_year < min(base_mult_dict.keys()):
-            base_mult = base_mult_dict[min(base_mult_dict.keys())]
-        else:
-            base_mult = base_mult_dict[max(base_mult_dict.keys())]
-
-        above_fra = _sub_years_months(start_age, fra)
-        if above_fra >= (0, 0):
-            #    if above_fra[0] >= 0 and above_fra[1] >= 0:
-            return (1.0 + (base_mult * above_fra[0])
-                    + (base_mult * above_fra[1])/12)
-
-        bp1 = _sub_years_months(fra, (3, 0))
-        above_bp1 = _sub_years_months(start_age, bp1)
-        if above_bp1 >= (0, 0):
-            return 0.8 + 0.2*above_bp1[0]/3 + 0.2*above_bp1[1]/36
-
-        below_bp1 = _sub_years_months(bp1, start_age)
-        return 0.8 - 0.05*below_bp1[0] - 0.05*below_bp1[1]/12
+        return _calc_benefit_multiplier(
+            ben_start_years*12 + ben_start_months, self._fra_months,
+            self._bp1_months, self._base_mult,
+            self.calc_benefit_birthday.day == 1)
 
     def _calc_mo_base_benefit(self):
         """
@@ -472,6 +622,18 @@ class SSWorker:
         self.base_benefit, self.bp1, self.bp2 = self.config.calc_base_benefit(
             self.calc_benefit_birthday.year,
             self.earnings.get_aime())
+        # The COLA-adjusted base benefit for each year from the year the
+        # worker turns 62, indexed by year - self._cola_base_year. Only the
+        # first self._cola_count years are calculated, the rest are
+        # calculated as later benefit years are asked for, see
+        # _calc_benefit_cola
+        self._cola_base_year = self.calc_benefit_birthday.year + SS_BENEFIT_AGE
+        self._cola_arr = np.zeros(_BENEFIT_YEARS)
+        self._cola_arr[0] = self.base_benefit
+        self._cola_count = 1
+        # The monthly benefit for each of those years, indexed the same way
+        self._mo_benefit_arr = np.zeros(_BENEFIT_YEARS, dtype=np.int64)
+        self._calc_mo_benefits(0, 1)
 
     def get_mo_benefit(self, benefit_date=None):
         """
@@ -515,9 +677,7 @@ class SSWorker:
         # birthday is on the 2nd, in which case you can start to collect
         # benefits at age 62 years, 0 months.
 
-        if (self.collection_start_age[0] == SS_BENEFIT_AGE
-                and self.collection_start_age[1] == 0
-                and self.calc_benefit_birthday != 1):
+        if self._ineligible_at_62_0:
             # Tecnically, we are checking if the worker was age 62 for every
             # day of the month, given that their SSA age is one day prior
             # (which is what self.calc_benefit_birthday is). IF for some
@@ -532,46 +692,27 @@ class SSWorker:
             return 0.0
 
         # To clarify:
-            # benefit_start_date is the day the worker chose to start
-            #   receiving benefits
+            # benefit_start_year, benefit_start_month is the month the
+            #   worker chose to start receiving benefits
             # benefit_date is the day we are calculating the benefit for
 
-        benefit_start_date = \
-            (self.calc_benefit_birthday
-             + relativedelta(years=self.collection_start_age[0],
-                             months=self.collection_start_age[1],
-                             day=1))
+        start_year = self._benefit_start_year
         if benefit_date is None:
-            benefit_year = benefit_start_date.year
-            benefit_month = benefit_start_date.month
+            benefit_year = start_year
         else:
-            benefit_year = benefit_date[0]
-            benefit_month = benefit_date[1]
-#            print(benefit_year, benefit_start_date.year)
-#            print(benefit_month, benefit_start_date.month)
-            if ((benefit_year < benefit_start_date.year)
-                or ((benefit_year == benefit_start_date.year)
-                    and (benefit_month < benefit_start_date.month))):
-                #                print("returning not eligible")
+            benefit_year, benefit_month = benefit_date
+            if ((benefit_year < start_year)
+                or ((benefit_year == start_year)
+                    and (benefit_month < self._benefit_start_month))):
                 # ineligible year, month, do not put in cache
                 # we would have to have the cache be by month, too, and
                 # this is a lot of complexity for little benefit
-#                print(benefit_year)
-#                print(benefit_start_date.year)
-#                print(benefit_month)
-#                print(benefit_start_date.month)
-#                print("ineligible")
                 return 0.0
 
-        # first retrieve out of the cache
-        # if the benefit has already been calculated, then simply retirieve
-        # it from the cache, which is erased when relevant worker variables
-        # are changed
-        benefit = 0.0
-        if benefit_year in self.mo_benefit:
-            benefit = self.mo_benefit[benefit_year]
-#            print("benefit in chache", benefit)
-            return benefit
+        index = benefit_year - self._cola_base_year
+        if index < 0:
+            # no benefits can be collected before age 62
+            return 0.0
 
         # Now to calculate the benefit. Note that these calculations must be
         # performed in this specific order, and all calcuations use the
@@ -613,12 +754,12 @@ class SSWorker:
         # get the cost-of-living-adjusted (COLA) base benefit
         #
         # note this may already be calculated and is in cache which is
-        # erased when relevant worker variables are changed
-        if benefit_year not in self.mo_benefit_cola:
+        # erased when relevant worker variables are changed. The benefit
+        # (see below) is calculated along with it, so if the benefit has
+        # already been calculated, it is simply retrieved from the cache
+        if index >= self._cola_count:
             self._calc_benefit_cola(benefit_year)
 
-#        print(self.mo_benefit_cola[benefit_year])
-
         # now the actual benefit is calculated
         # we have calculated the base benefit, then adjusted for cost-of-living
         # increases from age 62 to the benefit year
@@ -629,13 +770,10 @@ class SSWorker:
         # worker's age of collecting benefits is changed
         # Note the worker's birth year cannot be changed, instead a new
         # worker would need to be instantiated.
+        # The benefit for each year is calculated together with the COLA
+        # base benefit in _calc_benefit_cola, see _calc_mo_benefits
         #
-        benefit = math.floor((self.mo_benefit_cola[benefit_year]
-                             * self.benefit_multiplier))
-
-#        print(self.benefit_multiplier)
-
-#        print(benefit)
+        benefit = int(self._mo_benefit_arr[index])
 
         # TBD and NOT IMPLEMENTED:
         # If the worker elects to receive benefits before full retirement age
@@ -732,9 +870,76 @@ class SSWorker:
                 print("reduced benefit")
         """
 
-        self.mo_benefit[benefit_year] = benefit
         return benefit
 
+    def _calc_benefit_start(self):
+        """
+        Internal method for calculating the year and month the worker starts
+        to receive benefits, and whether the worker is eligible to receive
+        benefits at that age at all, based on the collection start age. These
+        only change with the collection start age, so they are stored in
+        self._benefit_start_year, self._benefit_start_month and
+        self._ineligible_at_62_0 rather than calculated for every benefit.
+
+        Returns
+        -------
+        None.
+
+        """
+        cbb = self.calc_benefit_birthday
+        # months are counted from January of year 0, then split back up
+        year, month = divmod(
+            (cbb.year + self.collection_start_age[0])*12 + cbb.month - 1
+            + self.collection_start_age[1], 12)
+        self._benefit_start_year = year
+        self._benefit_start_month = month + 1
+        # see get_mo_benefit
+        self._ineligible_at_62_0 = (
+            self.collection_start_age == (SS_BENEFIT_AGE, 0)
+            and self.calc_benefit_birthday.day != 1)
+
+    def get_mo_benefit_range(self, start_year, end_year, benefit_month=1):
+        """
+        Retrieves the monthly benefit for the worker in the same month of
+        each year of a range of years, the same as calling get_mo_benefit()
+        for each year. The benefits are not cached.
+
+        Parameters
+        ----------
+        start_year : int
+            The first year of the range.
+        end_year : int
+            The year after the last year of the range.
+        benefit_month : int, optional
+            The month of each year for which the monthly benefit will be
+            retrieved. The default is 1 (January).
+
+        Returns
+        -------
+        numpy array of int
+            The monthly benefit in whole dollars for each year, indexed by
+            year - start_year. The benefit is 0 for years the worker is not
+            eligible for benefits in benefit_month.
+
+        """
+        benefits = np.zeros(max(end_year - start_year, 0), dtype=np.int64)
+        # see get_mo_benefit for the eligibility rules
+        if self._ineligible_at_62_0:
+            return benefits
+
+        first_year = max(start_year, self._benefit_start_year,
+                         self._cola_base_year)
+        if benefit_month < self._benefit_start_month:
+            first_year = max(first_year, self._benefit_start_year + 1)
+        if first_year >= end_year:
+            return benefits
+
+        self._calc_benefit_cola(end_year - 1)
+        first = first_year - self._cola_base_year
+        end = end_year - self._cola_base_year
+        benefits[first_year - start_year:] = self._mo_benefit_arr[first:end]
+        return benefits
+
     def get_benefit_info(self):
         """
         Gets benefit information about the calculation